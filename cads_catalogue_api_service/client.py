@@ -14,6 +14,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import contextvars
+import threading
+import time
 import urllib
 from typing import Any, Type
 
@@ -35,14 +39,35 @@ from . import (
     dependencies,
     exceptions,
     extensions,
+    metrics,
     models,
+    resolver,
     sanity_check,
     search_utils,
+    timing,
 )
-from .fastapisessionmaker import FastAPISessionMaker
+from .deadline import Deadline, facets_duration, get_deadline, service_saturated
+from .fastapisessionmaker import FastAPISessionMaker, retry_on_disconnect
+from .replicas import ReplicaSessionMaker
 
 logger = structlog.getLogger(__name__)
 
+# Executor running independent parts of a search concurrently, each with its own session
+search_executor = (
+    concurrent.futures.ThreadPoolExecutor(
+        max_workers=config.settings.search_concurrency,
+        thread_name_prefix="search",
+    )
+    if config.settings.search_concurrency
+    else None
+)
+# Executor prefetching the next page of dataset searches, bounded by `prefetch_budget`
+prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=max(config.settings.prefetch_workers, 1),
+    thread_name_prefix="prefetch",
+)
+prefetch_budget = threading.BoundedSemaphore(max(config.settings.prefetch_workers, 1))
+
 
 def get_sorting_clause(
     model: type[cads_catalogue.database.Resource], sort: str
@@ -63,14 +88,12 @@ def get_sorting_clause(
     return supported_sorts.get(sort) or supported_sorts["update"]
 
 
-def apply_sorting_and_limit(
+def apply_sorting(
     search: sqlalchemy.orm.Query,
     sortby: str,
-    page: int,
-    limit: int,
     q: str | None = "",
 ):
-    """Apply sortby and limit to the running query."""
+    """Apply sortby to the running query."""
     sorting_clause = get_sorting_clause(cads_catalogue.database.Resource, sortby)
     sort_by, sort_order_fn = sorting_clause
 
@@ -88,6 +111,18 @@ def apply_sorting_and_limit(
     else:
         search = search.order_by(sort_order_fn(sort_by))
 
+    return search
+
+
+def apply_sorting_and_limit(
+    search: sqlalchemy.orm.Query,
+    sortby: str,
+    page: int,
+    limit: int,
+    q: str | None = "",
+):
+    """Apply sortby and limit to the running query."""
+    search = apply_sorting(search, sortby=sortby, q=q)
     search = search.offset(page * limit).limit(limit)
 
     return search
@@ -129,6 +164,35 @@ def generate_assets(
     return assets
 
 
+def generate_form_links(
+    model: cads_catalogue.database.Resource,
+) -> list[dict[str, Any]]:
+    """Generate form and constraints links (if defined)."""
+    form_links: list[dict[str, Any]] = []
+    if model.form:
+        # More an exception that normality, but we can have dataset with no form
+        form_links.append(
+            {
+                "rel": "form",
+                "href": urllib.parse.urljoin(
+                    config.settings.document_storage_url, model.form
+                ),
+                "type": "application/json",
+            }
+        )
+    if model.constraints:
+        form_links.append(
+            {
+                "rel": "constraints",
+                "href": urllib.parse.urljoin(
+                    config.settings.document_storage_url, model.constraints
+                ),
+                "type": "application/json",
+            }
+        )
+    return form_links
+
+
 def generate_collection_links(
     model: cads_catalogue.database.Resource,
     request: fastapi.Request,
@@ -188,28 +252,8 @@ def generate_collection_links(
             if doc.get("url")
         ]
 
-        # Form definition
-        if model.form:
-            # More an exception that normality, but we can have dataset with no form
-            additional_links += [
-                {
-                    "rel": "form",
-                    "href": urllib.parse.urljoin(
-                        config.settings.document_storage_url, model.form
-                    ),
-                    "type": "application/json",
-                }
-            ]
-        if model.constraints:
-            additional_links += [
-                {
-                    "rel": "constraints",
-                    "href": urllib.parse.urljoin(
-                        config.settings.document_storage_url, model.constraints
-                    ),
-                    "type": "application/json",
-                },
-            ]
+        # Form definition and constraints
+        additional_links += generate_form_links(model)
 
         # Retrieve process
         additional_links.append(
@@ -282,7 +326,7 @@ def lookup_id(
         search = (
             session.query(record)
             .options(
-                *database.deferred_columns,
+                *database.load_only("detail"),
                 sqlalchemy.orm.selectinload(record.licences),
             )
             .filter(record.resource_uid == id)
@@ -298,23 +342,79 @@ def lookup_id(
     return row
 
 
+def active_message_statement(
+    resource_uid: str, filter_types: list[str]
+) -> sqlalchemy.StatementLambdaElement:
+    """Return the statement selecting the latest active message of a dataset.
+
+    This runs for every serialized dataset: as a lambda statement, it's built (and
+    compiled) only once.
+    """
+    return sqlalchemy.lambda_stmt(
+        lambda: (
+            sqlalchemy.select(cads_catalogue.database.Message)
+            .join(cads_catalogue.database.Message.resources)
+            .where(
+                cads_catalogue.database.Resource.resource_uid == resource_uid,
+                cads_catalogue.database.Message.live.is_(True),
+                cads_catalogue.database.Message.severity.in_(filter_types),
+            )
+            .order_by(cads_catalogue.database.Message.date.desc())
+            .limit(1)
+        )
+    )
+
+
+def prefetch_active_messages(
+    session: sqlalchemy.orm.Session,
+    resource_uids: list[str],
+    filter_types=["warning", "critical"],
+) -> None:
+    """Load the latest active message of many datasets with a single query.
+
+    Messages are kept in the session, and used by `get_active_message`.
+    """
+    filter_types = list(filter_types)
+    stmt = sqlalchemy.lambda_stmt(
+        lambda: (
+            sqlalchemy.select(
+                cads_catalogue.database.Message,
+                cads_catalogue.database.Resource.resource_uid,
+            )
+            .join(cads_catalogue.database.Message.resources)
+            .where(
+                cads_catalogue.database.Resource.resource_uid.in_(resource_uids),
+                cads_catalogue.database.Message.live.is_(True),
+                cads_catalogue.database.Message.severity.in_(filter_types),
+            )
+            .order_by(cads_catalogue.database.Message.date.desc())
+        )
+    )
+    messages: dict[str, cads_catalogue.database.Message | None] = dict.fromkeys(
+        resource_uids
+    )
+    for message, resource_uid in session.execute(stmt):
+        if messages[resource_uid] is None:
+            messages[resource_uid] = message
+    prefetched = session.info.setdefault("active_messages", {})
+    for resource_uid, message in messages.items():
+        prefetched[(resource_uid, tuple(filter_types))] = message
+
+
 def get_active_message(
     db_model: cads_catalogue.database.Resource,
     session: sqlalchemy.orm.Session,
     filter_types=["warning", "critical"],
 ) -> models.Message | None:
     """Return the latest active message for a dataset."""
-    message = (
-        session.query(cads_catalogue.database.Message)
-        .join(cads_catalogue.database.Message.resources)
-        .where(
-            cads_catalogue.database.Resource.resource_uid == db_model.resource_uid,
-            cads_catalogue.database.Message.live.is_(True),
-            cads_catalogue.database.Message.severity.in_(filter_types),
-        )
-        .order_by(cads_catalogue.database.Message.date.desc())
-        .first()
-    )
+    prefetched = session.info.get("active_messages", {})
+    key = (db_model.resource_uid, tuple(filter_types))
+    if key in prefetched:
+        message = prefetched[key]
+    else:
+        message = session.scalars(
+            active_message_statement(db_model.resource_uid, list(filter_types))
+        ).first()
     if message:
         return models.Message.model_validate(message)
     return None
@@ -441,7 +541,7 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
     )
 
     @property
-    def reader(self) -> FastAPISessionMaker:
+    def reader(self) -> FastAPISessionMaker | ReplicaSessionMaker:
         """Return the reader session on the catalogue database."""
         session_maker = dependencies.get_sessionmaker(read_only=True)
         return session_maker
@@ -486,75 +586,144 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
     def load_catalogue(
         self, session: sqlalchemy.orm.Session, request, q, portals
     ) -> list:
-        """Return the whole catalogue as a serialized structure."""
-        query = session.query(self.collection_table).options(*database.deferred_columns)
+        """Return the whole catalogue, reduced to the id and keywords needed for facets."""
+        query = session.query(self.collection_table).options(
+            *database.load_only("facets"),
+            sqlalchemy.orm.selectinload(self.collection_table.facets).load_only(
+                cads_catalogue.database.Facet.facet_name
+            ),
+        )
         query_results = search_utils.apply_filters(
             session, query, q, kw=None, idx=None, portals=portals
         ).all()
-        all_collections = []
+        return [
+            {
+                "id": collection.resource_uid,
+                "keywords": [facet.facet_name for facet in collection.facets],
+            }
+            for collection in query_results
+        ]
 
-        for collection in query_results:
-            try:
-                all_collections.append(
-                    collection_serializer(
-                        collection, session=session, request=request, preview=True
-                    )
-                )
-            except pydantic.ValidationError as e:
-                logger.error(
-                    "Collection validation failed",
-                    error=e,
-                    id=collection.resource_uid,
-                )
-        return all_collections
+    def search_facets(
+        self,
+        session: sqlalchemy.orm.Session,
+        request: fastapi.Request,
+        q: str | None,
+        kw: list[str] | None,
+        portals: list[str] | None,
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any] | None:
+        """Return the facets (the ``search`` structure) of datasets matching the search.
+
+        Facets don't depend on page, limit and sorting: they are cached by catalogue
+        version and search.
+        If not cached and their (estimated) computation time doesn't fit the `deadline`,
+        None is returned.
+        """
+        key = search_utils.search_key(q, kw, None, portals, sortby="")
+        resolver.index.ensure_fresh()
+        version = resolver.index.version
+        facets = search_utils.facets_cache.get(version, key)
+        if facets is None:
+            if deadline and not deadline.allows(facets_duration.value):
+                return None
+            start = time.perf_counter()
+            with timing.phase("facets"):
+                all_collections = self.load_catalogue(session, request, q, portals)
+            with timing.phase("populate_facets"):
+                facets = search_utils.populate_facets(
+                    all_collections=all_collections,
+                    collections={},  # type: ignore
+                    keywords=kw,
+                )["search"]
+            facets_duration.observe(time.perf_counter() - start)
+            search_utils.facets_cache.set(version, key, facets)
+        return facets
 
-    def all_datasets(
+    def datasets_facets(
         self,
         request: fastapi.Request,
         q: str | None = None,
         kw: list[str] | None = [],
-        idx: list[str] | None = [],
-        sortby: extensions.CatalogueSortCriterion = extensions.CatalogueSortCriterion.update_desc,
-        page: int = 0,
-        limit: int = 999,
-        route_name="Get Collections",
-        search_stats: bool = False,
-    ) -> stac_fastapi.types.stac.Collections | search_utils.CollectionsWithStats:
-        """Read datasets from the catalogue."""
+        deadline: Deadline | None = None,
+    ) -> dict[str, Any]:
+        """Read the facets of datasets matching the search."""
         portals = dependencies.get_portals_values(
             request.headers.get(config.PORTAL_HEADER_NAME)
         )
-
-        route_ref = str(request.url_for(route_name))
-        base_url = str(request.base_url)
-
         with self.reader.context_session() as session:
-            search = session.query(self.collection_table).options(
-                *database.deferred_columns,
-                sqlalchemy.orm.selectinload(self.collection_table.licences),
+            return self.search_facets(  # type: ignore
+                session, request, q, kw, portals, deadline=deadline
             )
+
+    def search_ids(
+        self,
+        session: sqlalchemy.orm.Session,
+        q: str | None,
+        kw: list[str] | None,
+        idx: list[str] | None,
+        portals: list[str] | None,
+        sortby: str,
+    ) -> list[int]:
+        """Return the ordered ids of all the datasets matching the search.
+
+        Ids are cached by catalogue version: page requests of the same search only
+        load the requested page.
+        """
+        key = search_utils.search_key(q, kw, idx, portals, sortby)
+        resolver.index.ensure_fresh()
+        version = resolver.index.version
+        ids = search_utils.search_ids_cache.get(version, key)
+        if ids is None:
             search = search_utils.apply_filters(
                 session,
-                search,
+                session.query(self.collection_table.resource_id),
                 q,
                 kw,
                 idx,
                 portals=portals,
-                sortby=sortby.value,
+                sortby=sortby,
             )
-            count = search.count()
-            search = apply_sorting_and_limit(
-                search=search, q=q, sortby=sortby, page=page, limit=limit
+            search = apply_sorting(search, sortby=sortby, q=q)
+            # stable order among pages of datasets with the same sorting value
+            search = search.order_by(self.collection_table.resource_id)
+            ids = [row.resource_id for row in search]
+            search_utils.search_ids_cache.set(version, key, ids)
+        return ids
+
+    def load_datasets(
+        self, session: sqlalchemy.orm.Session, ids: list[int]
+    ) -> list[cads_catalogue.database.Resource]:
+        """Load the datasets with the given ids (primary keys), in the same order."""
+        if not ids:
+            return []
+        rows = (
+            session.query(self.collection_table)
+            .options(
+                *database.load_only("preview"),
+                sqlalchemy.orm.selectinload(self.collection_table.licences),
+                sqlalchemy.orm.selectinload(self.collection_table.facets),
             )
-            collections = search.all()
-
-            if len(collections) == 0 and route_name != "Get Collections":
-                # For canonical STAC requests to /collections, we don't want to raise a 404
-                raise stac_fastapi.types.errors.NotFoundError(
-                    "Search does not match any dataset"
-                )
+            .filter(self.collection_table.resource_id.in_(ids))
+            .all()
+        )
+        rows_by_id = {row.resource_id: row for row in rows}
+        return [rows_by_id[id] for id in ids if id in rows_by_id]
 
-            serialized_collections = []
+    def serialize_datasets(
+        self,
+        session: sqlalchemy.orm.Session,
+        request: fastapi.Request,
+        collections: list[cads_catalogue.database.Resource],
+    ) -> list[stac_fastapi.types.stac.Collection]:
+        """Serialize a page of datasets (previews), skipping the invalid ones."""
+        with timing.phase("messages"):
+            # one query for the messages of all datasets in the page
+            prefetch_active_messages(
+                session, [collection.resource_uid for collection in collections]
+            )
+        serialized_collections = []
+        with timing.phase("serialize"):
             for collection in collections:
                 try:
                     serialized_collections.append(
@@ -568,6 +737,127 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
                         error=e,
                         id=collection.resource_uid,
                     )
+        return serialized_collections
+
+    def prefetch_page(
+        self,
+        request: fastapi.Request,
+        version: tuple,
+        page_key: tuple,
+        ids: list[int],
+    ) -> None:
+        """Serialize a page of datasets in background, storing it in the pages cache."""
+        try:
+            with self.reader.context_session() as session:
+                serialized_collections = self.serialize_datasets(
+                    session, request, self.load_datasets(session, ids)
+                )
+            search_utils.pages_cache.set(version, page_key, serialized_collections)
+            metrics.PAGE_PREFETCHES.labels(outcome="prefetched").inc()
+        except Exception as exc:
+            logger.warning("Page prefetch failed", error=exc)
+            metrics.PAGE_PREFETCHES.labels(outcome="failed").inc()
+        finally:
+            prefetch_budget.release()
+
+    def submit_prefetch(
+        self,
+        request: fastapi.Request,
+        version: tuple | None,
+        page_key: tuple,
+        ids: list[int],
+        deadline: Deadline,
+    ) -> None:
+        """Schedule `prefetch_page`, unless the service is busy or the page is cached."""
+        if version is None or search_utils.pages_cache.get(version, page_key):
+            return
+        if (
+            deadline.degraded
+            or service_saturated()
+            or not prefetch_budget.acquire(blocking=False)
+        ):
+            metrics.PAGE_PREFETCHES.labels(outcome="skipped").inc()
+            return
+        prefetch_executor.submit(
+            contextvars.copy_context().run,
+            self.prefetch_page,
+            request,
+            version,
+            page_key,
+            ids,
+        )
+
+    @retry_on_disconnect
+    def all_datasets(
+        self,
+        request: fastapi.Request,
+        q: str | None = None,
+        kw: list[str] | None = [],
+        idx: list[str] | None = [],
+        sortby: extensions.CatalogueSortCriterion = extensions.CatalogueSortCriterion.update_desc,
+        page: int = 0,
+        limit: int = 999,
+        route_name="Get Collections",
+        search_stats: bool = False,
+    ) -> stac_fastapi.types.stac.Collections | search_utils.CollectionsWithStats:
+        """Read datasets from the catalogue."""
+        portals = dependencies.get_portals_values(
+            request.headers.get(config.PORTAL_HEADER_NAME)
+        )
+
+        route_ref = str(request.url_for(route_name))
+        base_url = str(request.base_url)
+
+        deadline = get_deadline(request)
+        if (
+            deadline.enabled
+            and limit > config.settings.degraded_page_size
+            and (deadline.remaining() < deadline.budget / 2 or service_saturated())  # type: ignore
+        ):
+            # serve smaller pages when late or overloaded: links follow the new limit
+            limit = config.settings.degraded_page_size
+            deadline.degrade("limit")
+
+        facets_future = None
+        if search_stats and search_executor is not None:
+            # facets are computed meanwhile, on another connection
+            facets_future = search_executor.submit(
+                contextvars.copy_context().run,
+                self.datasets_facets,
+                request,
+                q,
+                kw,
+                deadline,
+            )
+
+        with self.reader.context_session() as session:
+            with timing.phase("ids"):
+                ids = self.search_ids(
+                    session, q=q, kw=kw, idx=idx, portals=portals, sortby=sortby.value
+                )
+            count = len(ids)
+            page_ids = ids[page * limit : page * limit + limit]
+
+            if len(page_ids) == 0 and route_name != "Get Collections":
+                # For canonical STAC requests to /collections, we don't want to raise a 404
+                raise stac_fastapi.types.errors.NotFoundError(
+                    "Search does not match any dataset"
+                )
+
+            version = resolver.index.version
+            search = search_utils.search_key(q, kw, idx, portals, sortby.value)
+            serialized_collections = search_utils.pages_cache.get(
+                version, (search, base_url, page, limit)
+            )
+            if serialized_collections is not None:
+                metrics.PAGE_PREFETCH_HITS.inc()
+                serialized_collections = list(serialized_collections)
+            else:
+                with timing.phase("page"):
+                    collections = self.load_datasets(session, page_ids)
+                serialized_collections = self.serialize_datasets(
+                    session, request, collections
+                )
 
             links = [
                 {
@@ -623,22 +913,42 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
                     }
                 )
 
+            if search_stats and facets_future is None:
+                # same transaction: facets are computed on the same snapshot as the page
+                facets = self.search_facets(
+                    session, request, q, kw, portals, deadline=deadline
+                )
+        if facets_future is not None:
+            try:
+                facets = facets_future.result(
+                    timeout=max(deadline.remaining(), 0) if deadline.enabled else None
+                )
+            except concurrent.futures.TimeoutError:
+                # computation goes on in background, filling the cache for next requests
+                facets = None
+        if search_stats and facets is None:
+            deadline.degrade("facets")
+            search_stats = False
+
+        if route_name == "Datasets Search" and not search_stats:
+            # facets not included: they can be retrieved (and cached) independently
+            qs = urllib.parse.urlencode({"q": q or "", "kw": kw or []}, doseq=True)
+            links.append(
+                {
+                    "rel": "facets",
+                    "href": f"{request.url_for('Datasets Facets')}?{qs}",
+                    "type": stac_pydantic.shared.MimeTypes.json,
+                }
+            )
+
         if search_stats:
             collections = search_utils.CollectionsWithStats(
                 collections=serialized_collections or [],
                 links=links,
                 numberMatched=count,
                 numberReturned=len(serialized_collections),
-                search={},
+                search=facets,
             )
-            with self.reader.context_session() as session:
-                all_collections = self.load_catalogue(session, request, q, portals)
-
-                collections = search_utils.populate_facets(
-                    all_collections=all_collections,
-                    collections=collections,
-                    keywords=kw,
-                )
         else:
             collections = stac_fastapi.types.stac.Collections(
                 collections=serialized_collections or [],
@@ -647,6 +957,16 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
                 numberReturned=len(serialized_collections),
             )
 
+        if config.settings.prefetch_next_page and (page + 1) * limit < count:
+            # users mostly page forward
+            self.submit_prefetch(
+                request,
+                version,
+                (search, base_url, page + 1, limit),
+                ids[(page + 1) * limit : (page + 2) * limit],
+                deadline,
+            )
+
         return collections
 
     def all_collections(
@@ -656,6 +976,7 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
         """Read all collections from the catalogue."""
         return self.all_datasets(**kwargs)
 
+    @retry_on_disconnect
     def get_collection(
         self,
         collection_id: str,
@@ -670,14 +991,21 @@ class CatalogueClient(stac_fastapi.types.core.BaseCoreClient):
         portals = dependencies.get_portals_values(
             request.headers.get(config.PORTAL_HEADER_NAME)
         )
-        with self.reader.context_session() as session:
-            collection = lookup_id(
-                collection_id, self.collection_table, session, portals=portals
+        if resolver.index.is_unknown(collection_id, portals=portals):
+            metrics.NEGATIVE_LOOKUPS.labels(route="collection").inc()
+            raise stac_fastapi.types.errors.NotFoundError(
+                f"{self.collection_table.__name__} {collection_id} not found"
             )
-            try:
-                return collection_serializer(
-                    collection, session=session, request=request, preview=False
+        with self.reader.context_session() as session:
+            with timing.phase("dataset"):
+                collection = lookup_id(
+                    collection_id, self.collection_table, session, portals=portals
                 )
+            try:
+                with timing.phase("serialize"):
+                    return collection_serializer(
+                        collection, session=session, request=request, preview=False
+                    )
             except pydantic.ValidationError as e:
                 logger.error(
                     "Collection validation failed",
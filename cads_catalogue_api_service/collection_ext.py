@@ -20,10 +20,11 @@ import fastapi
 import sqlalchemy as sa
 import stac_fastapi.types
 import stac_fastapi.types.core
+import stac_fastapi.types.links
 
-from cads_catalogue_api_service.client import collection_serializer
+from cads_catalogue_api_service.client import generate_form_links
 
-from . import dependencies
+from . import database, dependencies, metrics, resolver
 
 router = fastapi.APIRouter(
     prefix="",
@@ -36,13 +37,34 @@ def query_collection(
     collection_id: str,
     request: fastapi.Request,
 ) -> stac_fastapi.types.stac.Collection:
-    """Load a STAC collection from database."""
-    return collection_serializer(
-        session.query(cads_catalogue.database.Resource)
-        .filter(cads_catalogue.database.Resource.resource_uid == collection_id)
-        .one(),
-        session=session,
-        request=request,
+    """Load the minimal STAC collection (id and form links) required for redirecting.
+
+    The in-memory resolver index is used first, falling back to a column-only query.
+    """
+    if resolver.index.is_unknown(collection_id):
+        metrics.NEGATIVE_LOOKUPS.labels(route="form").inc()
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"Collection {collection_id} not found",
+        )
+    collection = resolver.index.get(collection_id)
+    if collection is None:
+        try:
+            collection = (
+                session.query(*database.FORM_REDIRECT_COLUMNS)
+                .filter(cads_catalogue.database.Resource.resource_uid == collection_id)
+                .one()
+            )
+        except sa.orm.exc.NoResultFound as exc:
+            raise fastapi.HTTPException(
+                status_code=fastapi.status.HTTP_404_NOT_FOUND,
+                detail=f"Collection {collection_id} not found",
+            ) from exc
+    return stac_fastapi.types.stac.Collection(
+        id=collection.resource_uid,
+        links=stac_fastapi.types.links.resolve_links(
+            generate_form_links(collection), str(request.base_url)
+        ),
     )
 
 
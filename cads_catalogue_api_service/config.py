@@ -17,6 +17,8 @@ Options are based on pydantic.BaseSettings, so they automatically get values fro
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from typing import Any, Literal
+
 import cads_catalogue.config
 import pydantic
 import pydantic_settings
@@ -38,6 +40,39 @@ class SqlalchemySettings(stac_fastapi.types.config.ApiSettings):  # type: ignore
     # Fields which are item properties but indexed as distinct fields in the database model
     indexed_fields: set[str] = {"datetime"}
 
+    # Use SERIALIZABLE READ ONLY DEFERRABLE transactions for reads (not on hot standby)
+    read_only_deferrable: bool = False
+
+    # Connection pool configuration (cads_catalogue configuration is kept if None)
+    pool_size: int | None = None
+    pool_max_overflow: int | None = None
+    pool_timeout: int | None = None  # seconds
+    pool_recycle: int | None = None  # seconds
+    # Connections idle for longer than this number of seconds are pinged before being used
+    pool_idle_ping_seconds: int = 30
+
+    # Additional read replicas: reads are balanced among them and connection_string_read
+    read_replicas: list[str] = []
+    # Number of seconds a failing read replica is excluded for
+    read_replica_retry_after: int = 30
+    # Maximum replication lag (in seconds) allowed on read replicas (not checked if None)
+    read_replica_max_lag: float | None = None
+    read_replica_lag_check_interval: int = 10
+
+    @property
+    def engine_options(self) -> dict[str, Any]:
+        """Keyword arguments for the creation of the sqlalchemy engines (see `get_engine`)."""
+        pool_options = {
+            "pool_size": self.pool_size,
+            "max_overflow": self.pool_max_overflow,
+            "timeout": self.pool_timeout,
+            "recycle": self.pool_recycle,
+        }
+        return {
+            "idle_ping_seconds": self.pool_idle_ping_seconds,
+            **{key: value for key, value in pool_options.items() if value is not None},
+        }
+
     @property
     def connection_string(self) -> str:
         """Create reader psql connection string."""
@@ -65,6 +100,63 @@ class Settings(pydantic_settings.BaseSettings):
     external_search_endpoint: str | None = None
     external_search_timeout: int = 5  # seconds
     external_search_distance_threshold: float = 0.5
+    # SQL shape of the keywords filter: an INTERSECT of a query per category
+    # ("intersect"), an IN subquery per category in the same query ("subqueries"), or a
+    # single pass on dataset facets grouped by dataset ("grouped")
+    keywords_filter_strategy: Literal["intersect", "subqueries", "grouped"] = (
+        "intersect"
+    )
+    # Time budget (in seconds) of search requests: facets are omitted when they would not
+    # fit it, and large pages are reduced when late or overloaded (disabled if None)
+    request_time_budget: float | None = None
+    degraded_page_size: int = 50
+    # Number of threads computing facets while the page is loaded. With 0 they are
+    # computed afterwards, in the same transaction and snapshot as the page. Otherwise
+    # each thread uses a pooled connection, and its own snapshot: facets may then
+    # reflect a catalogue update the page does not.
+    search_concurrency: int = 0
+    # Compute the next page of dataset searches in background after serving a page, with
+    # at most `prefetch_workers` pages at a time (skipped when the service is busy)
+    prefetch_next_page: bool = False
+    prefetch_workers: int = 2
+    # Fraction of requests reporting their phases in the Server-Timing header; requests
+    # with the debug header always report them (phases are always sent to Prometheus)
+    server_timing_sample_rate: float = 0.0
+    server_timing_debug_header: str = "X-Debug-Timing"
+    # File where a sample of anonymized request lines is appended (disabled if None), to
+    # be replayed by `python -m cads_catalogue_api_service.replay`
+    traffic_capture_path: str | None = None
+    traffic_capture_sample_rate: float = 1.0
+    # SQL statements slower than this number of seconds are logged (disabled if None),
+    # with their EXPLAIN ANALYZE output if enabled (the statement is executed again)
+    slow_query_threshold: float | None = None
+    slow_query_explain: bool = False
+    # Requests with the debug header set to this token get, instead of their response,
+    # their SQL statements (explained) and timings (disabled if None)
+    sql_debug_token: str | None = None
+    sql_debug_header: str = "X-Debug-SQL"
+    # Requests with the profiling header set to this token get, instead of their
+    # response, their sampled stacks; the header also gives access to the /profile
+    # endpoint, profiling the worker for some seconds (disabled if None)
+    profiling_token: str | None = None
+    profiling_header: str = "X-Debug-Profile"
+    profiling_interval: float = 0.005  # seconds between two samples
+    profiling_max_seconds: float = 60
+    # Number of worker threads running sync endpoints (anyio default if None)
+    threadpool_size: int | None = None
+    # Number of seconds between two threadpool queue time measurements (0 to disable)
+    threadpool_probe_interval: float = 5
+    # Warm-up run at startup: the readiness endpoint reports unready until it completes
+    warmup_enabled: bool = True
+    warmup_connections: int = 2  # connections opened in each pool
+    warmup_paths: list[str] = [
+        "/datasets",
+        "/collections",
+        "/vocabularies/keywords",
+        "/vocabularies/licences",
+        "/messages",
+    ]
+    warmup_timeout: float = 60  # seconds
 
     @pydantic.field_validator("external_search_enabled", mode="before")
     @classmethod
@@ -90,6 +182,22 @@ class CachesSettings(pydantic_settings.BaseSettings):
     external_search_service_cache_maxsize: int = 64
     http_cache_time: int = 180
     http_cache_stale_time: int = 60
+    # Number of seconds between two catalogue version checks of the in-memory resolver index
+    resolver_check_interval: int = 60
+    # Answer 404 for unknown dataset ids and DOIs using the resolver index, without loading
+    # them (the catalogue version is checked first, to include datasets just published)
+    negative_lookup_enabled: bool = True
+    # Number of seconds a catalogue version check confirms unknown datasets for: datasets
+    # published meanwhile get a 404 at most for this time
+    negative_lookup_recheck_interval: float = 1
+    # Number of searches whose ordered matching dataset ids are cached (0 to disable)
+    search_ids_cache_maxsize: int = 256
+    search_ids_cache_ttl: int = 180
+    # Number of searches whose facets are cached (0 to disable)
+    facets_cache_maxsize: int = 256
+    # Number of prefetched pages of dataset searches (see `Settings.prefetch_next_page`)
+    pages_cache_maxsize: int = 128
+    pages_cache_ttl: int = 60
 
 
 dbsettings = SqlalchemySettings()
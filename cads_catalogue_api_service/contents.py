@@ -20,7 +20,7 @@ import cads_catalogue
 import fastapi
 import sqlalchemy as sa
 
-from . import config, dependencies, extensions, models
+from . import config, dependencies, extensions, models, timing
 
 router = fastapi.APIRouter(
     prefix="/contents",
@@ -30,29 +30,30 @@ router = fastapi.APIRouter(
 
 
 def _apply_common_filters(
-    query,
+    stmt: sa.StatementLambdaElement,
     site: str,
     ctype: str | list[str] | None = None,
     related_dataset: list[str] | None = None,
-):
-    filters = [
+) -> sa.StatementLambdaElement:
+    stmt += lambda s: s.where(
         cads_catalogue.database.Content.site == site,
         cads_catalogue.database.Content.hidden.is_(False),
-    ]
+    )
 
     if isinstance(ctype, str):
         ctype = [ctype]
 
     if ctype:
-        filters.append(cads_catalogue.database.Content.type.in_(ctype))
+        stmt += lambda s: s.where(cads_catalogue.database.Content.type.in_(ctype))
 
     if related_dataset:
-        query = query.join(cads_catalogue.database.Content.resources).distinct()
-        filters.append(
-            cads_catalogue.database.Resource.resource_uid.in_(related_dataset)
+        stmt += lambda s: (
+            s.join(cads_catalogue.database.Content.resources)
+            .distinct()
+            .where(cads_catalogue.database.Resource.resource_uid.in_(related_dataset))
         )
 
-    return query.where(*filters)
+    return stmt
 
 
 def get_sorting_clause(sort: str) -> tuple:
@@ -64,6 +65,29 @@ def get_sorting_clause(sort: str) -> tuple:
     return supported_sorts.get(sort) or supported_sorts["title"]
 
 
+def contents_statement(
+    site: str,
+    ctype: list[str] | None = None,
+    related_dataset: list[str] | None = None,
+    sortby: str = "title",
+) -> sa.StatementLambdaElement:
+    """Return the statement selecting contents, by priority then by `sortby`."""
+    # Get secondary sorting clause
+    sort_by, sort_order_fn = get_sorting_clause(sortby)
+    secondary_sorting = sort_order_fn(sort_by)
+
+    stmt_query = _apply_common_filters(
+        sa.lambda_stmt(lambda: sa.select(cads_catalogue.database.Content)),
+        site,
+        ctype,
+        related_dataset,
+    )
+    stmt_query += lambda s: s.order_by(
+        sa.desc(cads_catalogue.database.Content.priority), secondary_sorting
+    )
+    return stmt_query
+
+
 def query_contents(
     session: sa.orm.Session,
     site: str,
@@ -75,27 +99,21 @@ def query_contents(
     if isinstance(ctype, str):
         ctype = [ctype]
 
-    base_query = sa.select(
-        sa.func.count(sa.distinct(cads_catalogue.database.Content.content_id))
-    )
     stmt_count = _apply_common_filters(
-        base_query.select_from(cads_catalogue.database.Content),
+        sa.lambda_stmt(
+            lambda: sa.select(
+                sa.func.count(sa.distinct(cads_catalogue.database.Content.content_id))
+            ).select_from(cads_catalogue.database.Content)
+        ),
         site,
         ctype,
         related_dataset,
     )
     count = session.execute(stmt_count).scalar()
 
-    # Get secondary sorting clause
-    sort_by, sort_order_fn = get_sorting_clause(sortby)
-
-    stmt_query = _apply_common_filters(
-        sa.select(cads_catalogue.database.Content), site, ctype, related_dataset
-    ).order_by(
-        sa.desc(cads_catalogue.database.Content.priority), sort_order_fn(sort_by)
-    )
-
-    results = session.scalars(stmt_query).all()
+    results = session.scalars(
+        contents_statement(site, ctype, related_dataset, sortby)
+    ).all()
     return count, results
 
 
@@ -107,10 +125,11 @@ def query_content(
 ):
     """Perform a database query for a single content."""
     stmt_query = _apply_common_filters(
-        sa.select(cads_catalogue.database.Content), site, ctype
-    ).where(
-        cads_catalogue.database.Content.slug == id,
+        sa.lambda_stmt(lambda: sa.select(cads_catalogue.database.Content)),
+        site,
+        ctype,
     )
+    stmt_query += lambda s: s.where(cads_catalogue.database.Content.slug == id)
     result = session.scalars(stmt_query).one()
     return result
 
@@ -192,7 +211,8 @@ def _build_content(content, request: fastapi.Request):
 
 
 def _build_contents_response(results, request: fastapi.Request):
-    return [_build_content(content, request=request) for content in results]
+    with timing.phase("serialize"):
+        return [_build_content(content, request=request) for content in results]
 
 
 @router.get(
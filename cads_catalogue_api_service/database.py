@@ -28,3 +28,105 @@ OMITTABLE_COLUMNS = [
 ]
 
 deferred_columns = [sqlalchemy.orm.defer(col) for col in OMITTABLE_COLUMNS]
+
+# *** Column projections ***
+# Each consumer of the resources table loads only the columns it actually emits.
+# Columns not listed here are still reachable (they are lazy loaded on access), but
+# this costs an additional query per row: keep these lists in sync with the serializers.
+
+PREVIEW_COLUMNS = [
+    cads_catalogue.database.Resource.resource_uid,
+    cads_catalogue.database.Resource.title,
+    cads_catalogue.database.Resource.abstract,
+    cads_catalogue.database.Resource.previewimage,
+    cads_catalogue.database.Resource.qa_flag,
+    cads_catalogue.database.Resource.publication_date,
+    cads_catalogue.database.Resource.resource_update,
+    cads_catalogue.database.Resource.doi,
+    cads_catalogue.database.Resource.disabled_reason,
+    cads_catalogue.database.Resource.hidden,
+    cads_catalogue.database.Resource.sanity_check,
+    cads_catalogue.database.Resource.update_frequency,
+    cads_catalogue.database.Resource.fair_score,
+    cads_catalogue.database.Resource.ds_responsible_organisation,
+    # required by cads_catalogue.stac_helpers.get_extent
+    cads_catalogue.database.Resource.geo_extent,
+    cads_catalogue.database.Resource.begin_date,
+    cads_catalogue.database.Resource.end_date,
+]
+
+DETAIL_COLUMNS = PREVIEW_COLUMNS + [
+    cads_catalogue.database.Resource.documentation,
+    cads_catalogue.database.Resource.form,
+    cads_catalogue.database.Resource.constraints,
+    cads_catalogue.database.Resource.layout,
+]
+
+SCHEMA_ORG_COLUMNS = DETAIL_COLUMNS + [
+    cads_catalogue.database.Resource.responsible_organisation,
+    cads_catalogue.database.Resource.responsible_organisation_website,
+    cads_catalogue.database.Resource.responsible_organisation_role,
+    cads_catalogue.database.Resource.contactemail,
+    cads_catalogue.database.Resource.file_format,
+    cads_catalogue.database.Resource.keywords_urls,
+    cads_catalogue.database.Resource.content_size,
+    cads_catalogue.database.Resource.metadata_urls,
+]
+
+DOI_REDIRECT_COLUMNS = [
+    cads_catalogue.database.Resource.resource_uid,
+]
+
+FORM_REDIRECT_COLUMNS = [
+    cads_catalogue.database.Resource.resource_uid,
+    cads_catalogue.database.Resource.form,
+    cads_catalogue.database.Resource.constraints,
+]
+
+FACETS_COLUMNS = [
+    cads_catalogue.database.Resource.resource_uid,
+]
+
+RESOLVER_COLUMNS = [
+    cads_catalogue.database.Resource.resource_uid,
+    cads_catalogue.database.Resource.doi,
+    cads_catalogue.database.Resource.form,
+    cads_catalogue.database.Resource.constraints,
+    cads_catalogue.database.Resource.portal,
+]
+
+PROJECTIONS = {
+    "preview": PREVIEW_COLUMNS,
+    "detail": DETAIL_COLUMNS,
+    "schema_org": SCHEMA_ORG_COLUMNS,
+    "doi_redirect": DOI_REDIRECT_COLUMNS,
+    "form_redirect": FORM_REDIRECT_COLUMNS,
+    "facets": FACETS_COLUMNS,
+    "resolver": RESOLVER_COLUMNS,
+}
+
+
+def load_only(profile: str) -> list:
+    """Return the loader options restricting a Resource query to the given projection profile.
+
+    Relationships are not affected: they must be explicitly eager loaded by the caller.
+    """
+    return [sqlalchemy.orm.load_only(*PROJECTIONS[profile])]
+
+
+def query_catalogue_version(session: sqlalchemy.orm.Session) -> tuple:
+    """Return a cheap fingerprint of the catalogue content, changing at every catalogue update."""
+    return tuple(
+        session.execute(
+            sqlalchemy.select(
+                sqlalchemy.select(
+                    sqlalchemy.func.max(
+                        cads_catalogue.database.CatalogueUpdate.update_time
+                    )
+                ).scalar_subquery(),
+                sqlalchemy.select(
+                    sqlalchemy.func.max(cads_catalogue.database.Resource.record_update)
+                ).scalar_subquery(),
+            )
+        ).one()
+    )
@@ -0,0 +1,89 @@
+"""Per-request time budget, used to degrade responses gracefully under load."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import threading
+import time
+
+import fastapi
+
+from . import config, metrics
+
+PARTIAL_RESPONSE_HEADER_NAME = "X-Partial-Response"
+
+
+class Deadline:
+    """Time budget of a request, started when the request is received.
+
+    Parts of the response which are skipped to respect the budget are recorded as
+    ``degraded``, and reported to the client (see `middlewares.DeadlineMiddleware`).
+    """
+
+    def __init__(self, budget: float | None, start: float | None = None) -> None:
+        self.budget = budget
+        self.start = time.monotonic() if start is None else start
+        self.degraded: list[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget is not None
+
+    def remaining(self) -> float:
+        if self.budget is None:
+            return math.inf
+        return self.budget - (time.monotonic() - self.start)
+
+    def allows(self, duration: float) -> bool:
+        """Return True if an operation lasting `duration` seconds fits the budget."""
+        return duration <= self.remaining()
+
+    def degrade(self, feature: str) -> None:
+        self.degraded.append(feature)
+
+
+class DurationEstimate:
+    """Exponentially weighted moving average of the duration of an operation."""
+
+    def __init__(self, weight: float = 0.2) -> None:
+        self.weight = weight
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, duration: float) -> None:
+        with self._lock:
+            if self.value == 0.0:
+                self.value = duration
+            else:
+                self.value += self.weight * (duration - self.value)
+
+
+def get_deadline(request: fastapi.Request) -> Deadline:
+    """Return the deadline of the request (a new one if not set by the middleware)."""
+    deadline = getattr(request.state, "deadline", None)
+    if deadline is None:
+        deadline = Deadline(config.settings.request_time_budget)
+        request.state.deadline = deadline
+    return deadline
+
+
+def service_saturated() -> bool:
+    """Return True if requests are waiting for a worker thread."""
+    limiter = metrics.THREADPOOL_COLLECTOR.limiter
+    return limiter is not None and limiter.statistics().tasks_waiting > 0
+
+
+# duration of facets computation, when not cached
+facets_duration = DurationEstimate()
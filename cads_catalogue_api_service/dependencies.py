@@ -20,17 +20,57 @@ from typing import Iterator
 import fastapi
 import sqlalchemy
 
-from . import config, fastapisessionmaker
+from . import config, fastapisessionmaker, metrics, replicas
+
+
+def _new_sessionmaker(
+    connection_string: str, name: str, read_only: bool
+) -> fastapisessionmaker.FastAPISessionMaker:
+    session_maker = fastapisessionmaker.FastAPISessionMaker(
+        connection_string,
+        read_only=read_only,
+        deferrable=read_only and config.dbsettings.read_only_deferrable,
+        engine_options=config.dbsettings.engine_options,
+        name=name,
+    )
+    metrics.POOL_COLLECTOR.register(session_maker)
+    return session_maker
 
 
 @functools.lru_cache()
-def get_sessionmaker(read_only=True) -> fastapisessionmaker.FastAPISessionMaker:
-    """Generate a DB session using fastapi_utils."""
-    if read_only:
-        connection_string = config.dbsettings.connection_string_read
-    else:
-        connection_string = config.dbsettings.connection_string
-    return fastapisessionmaker.FastAPISessionMaker(connection_string)
+def get_sessionmaker(
+    read_only=True,
+) -> fastapisessionmaker.FastAPISessionMaker | replicas.ReplicaSessionMaker:
+    """Generate a DB session using fastapi_utils.
+
+    If read replicas are configured, read only sessions are balanced among them.
+    """
+    if not read_only:
+        return _new_sessionmaker(
+            config.dbsettings.connection_string, name="write", read_only=False
+        )
+    if not config.dbsettings.read_replicas:
+        return _new_sessionmaker(
+            config.dbsettings.connection_string_read, name="read", read_only=True
+        )
+    connection_strings = [config.dbsettings.connection_string_read] + [
+        dsn
+        for dsn in config.dbsettings.read_replicas
+        if dsn != config.dbsettings.connection_string_read
+    ]
+    return replicas.ReplicaSessionMaker(
+        replicas=[
+            _new_sessionmaker(dsn, name=f"replica-{i}", read_only=True)
+            for i, dsn in enumerate(connection_strings)
+        ],
+        # reads fall back on the primary
+        fallback=_new_sessionmaker(
+            config.dbsettings.connection_string, name="write-fallback", read_only=True
+        ),
+        retry_after=config.dbsettings.read_replica_retry_after,
+        max_lag=config.dbsettings.read_replica_max_lag,
+        lag_check_interval=config.dbsettings.read_replica_lag_check_interval,
+    )
 
 
 def get_session() -> Iterator[sqlalchemy.orm.Session]:
@@ -22,7 +22,7 @@ import stac_fastapi.types
 import stac_fastapi.types.core
 import structlog
 
-from . import client, dependencies
+from . import database, dependencies, metrics, resolver
 
 logger = structlog.getLogger(__name__)
 
@@ -38,14 +38,18 @@ def query_collection(
     doi: str,
     request: fastapi.Request,
 ) -> stac_fastapi.types.stac.Collection:
-    """Load a STAC collection from database."""
-    return client.collection_serializer(
-        session.query(cads_catalogue.database.Resource)
-        .filter(cads_catalogue.database.Resource.doi == doi)
-        .one(),
-        session=session,
-        request=request,
-    )
+    """Load the minimal STAC collection (only the id) required for redirecting.
+
+    The in-memory resolver index is used first, falling back to a column-only query.
+    """
+    collection = resolver.index.get_by_doi(doi)
+    if collection is None:
+        collection = (
+            session.query(*database.DOI_REDIRECT_COLUMNS)
+            .filter(cads_catalogue.database.Resource.doi == doi)
+            .one()
+        )
+    return stac_fastapi.types.stac.Collection(id=collection.resource_uid)
 
 
 @router.get("/{doi_prefix}/{doi_suffix}")
@@ -60,6 +64,12 @@ def redirect_by_doi(
     Required for keeping DOI compatibility from the old CDS.
     """
     doi = f"{doi_prefix}/{doi_suffix}"
+    if resolver.index.is_unknown_doi(doi):
+        metrics.NEGATIVE_LOOKUPS.labels(route="doi").inc()
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found",
+        )
     try:
         collection = query_collection(session, doi, request)
     except sa.orm.exc.NoResultFound as exc:
@@ -15,9 +15,13 @@
 # limitations under the License.
 
 import enum
+import hashlib
+import json
+from typing import Any
 
 import attr
 import fastapi
+import fastapi.responses
 import pydantic
 import stac_fastapi.types.extension
 import stac_fastapi.types.stac
@@ -108,6 +112,50 @@ def datasets_search_post(
     )
 
 
+class FacetsFormData(pydantic.BaseModel):
+    """Datasets facets valid payload."""
+
+    q: str = ""
+    kw: list[str] | None = []
+
+
+def facets_response(
+    request: fastapi.Request, facets: dict[str, Any]
+) -> fastapi.Response:
+    """Return the facets with an ETag, or a 304 response if the client has them already."""
+    etag = (
+        '"%s"' % hashlib.sha1(json.dumps(facets, sort_keys=True).encode()).hexdigest()
+    )
+    if request.headers.get("if-none-match") == etag:
+        return fastapi.Response(
+            status_code=fastapi.status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return fastapi.responses.JSONResponse(content=facets, headers={"ETag": etag})
+
+
+def datasets_facets(
+    request: fastapi.Request,
+    q: str = fastapi.Query(default=None, description="Full-text search query"),
+    kw: list[str] | None = fastapi.Query(
+        default=[], description="Filter by keyword(s)"
+    ),
+) -> fastapi.Response:
+    """Facets of datasets matching the search, independent from paging and sorting."""
+    return facets_response(
+        request, client.cads_client.datasets_facets(request=request, q=q, kw=kw)
+    )
+
+
+def datasets_facets_post(
+    request: fastapi.Request, data: FacetsFormData
+) -> fastapi.Response:
+    """Facets of datasets matching the search, independent from paging and sorting."""
+    return facets_response(
+        request,
+        client.cads_client.datasets_facets(request=request, q=data.q, kw=data.kw),
+    )
+
+
 @attr.s
 class DatasetsSearchExtension(stac_fastapi.types.extension.ApiExtension):
     """Datasets filter extension.
@@ -151,6 +199,18 @@ class DatasetsSearchExtension(stac_fastapi.types.extension.ApiExtension):
             methods=["POST"],
             endpoint=datasets_search_post,
         )
+        self.router.add_api_route(
+            name="Datasets Facets",
+            path="/datasets/facets",
+            methods=["GET"],
+            endpoint=datasets_facets,
+        )
+        self.router.add_api_route(
+            name="Datasets Facets",
+            path="/datasets/facets",
+            methods=["POST"],
+            endpoint=datasets_facets_post,
+        )
         app.include_router(self.router, tags=["Datasets Search Extension"])
 
 
@@ -2,13 +2,23 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+import functools
+import time
+from collections.abc import Callable, Iterator
 from contextlib import contextmanager
+from typing import Any, TypeVar
 
 import cads_catalogue
 import sqlalchemy as sa
+import structlog
 from sqlalchemy.orm import Session
 
+from . import metrics
+
+logger = structlog.getLogger(__name__)
+
+T = TypeVar("T")
+
 
 class FastAPISessionMaker:
     """
@@ -17,7 +27,14 @@ class FastAPISessionMaker:
     Intended for use creating ORM sessions injected into endpoint functions by FastAPI.
     """
 
-    def __init__(self, database_uri: str):
+    def __init__(
+        self,
+        database_uri: str,
+        read_only: bool = False,
+        deferrable: bool = False,
+        engine_options: dict[str, Any] | None = None,
+        name: str = "default",
+    ):
         """
         `database_uri` should be any sqlalchemy-compatible database URI.
 
@@ -28,8 +45,18 @@ class FastAPISessionMaker:
             "<scheme>://<user>:<password>@<host>:<port>/<database>"
 
         A concrete example looks like "postgresql://db_user:password@db:5432/app"
+
+        When `read_only` is set, every session runs a single read only transaction
+        (see `read_only_execution_options`) which is never committed.
+
+        `engine_options` are passed to `get_engine`, while `name` identifies the database
+        in logs and metrics.
         """
         self.database_uri = database_uri
+        self.read_only = read_only
+        self.deferrable = deferrable
+        self.engine_options = engine_options or {}
+        self.name = name
 
         self._cached_engine: sa.engine.Engine | None = None
         self._cached_sessionmaker: sa.orm.sessionmaker | None = None
@@ -54,7 +81,13 @@ class FastAPISessionMaker:
 
     def get_new_engine(self) -> sa.engine.Engine:
         """Return a new sqlalchemy engine using the instance's database_uri."""
-        return get_engine(self.database_uri)
+        engine_options = {
+            "poolclass": metrics.timed_pool_class(self.name),
+            **self.engine_options,
+        }
+        engine = get_engine(self.database_uri, **engine_options)
+        metrics.instrument_engine(engine, database=self.name)
+        return engine
 
     def get_new_sessionmaker(
         self, engine: sa.engine.Engine | None
@@ -65,6 +98,10 @@ class FastAPISessionMaker:
         If no engine is provided, the instance's (lazily-cached) engine is used.
         """
         engine = engine or self.cached_engine
+        if self.read_only:
+            engine = engine.execution_options(
+                **read_only_execution_options(deferrable=self.deferrable)
+            )
         return get_sessionmaker_for_engine(engine)
 
     def get_db(self) -> Iterator[Session]:
@@ -74,7 +111,7 @@ class FastAPISessionMaker:
         Can be used directly as a context-manager FastAPI dependency, or yielded from inside a
         separate dependency.
         """
-        yield from _get_db(self.cached_sessionmaker)
+        yield from _get_db(self.cached_sessionmaker, read_only=self.read_only)
 
     @contextmanager
     def context_session(self) -> Iterator[Session]:
@@ -93,6 +130,20 @@ class FastAPISessionMaker:
         """
         yield from self.get_db()
 
+    def pool_statistics(self) -> dict[str, int] | None:
+        """Return the connection pool statistics, or None if the engine is not created yet."""
+        if self._cached_engine is None:
+            return None
+        pool = self._cached_engine.pool
+        if not isinstance(pool, sa.pool.QueuePool):
+            return None
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+
     def reset_cache(self) -> None:
         """
         Reset the engine and sessionmaker caches.
@@ -104,14 +155,128 @@ class FastAPISessionMaker:
         self._cached_sessionmaker = None
 
 
-def get_engine(uri: str) -> sa.engine.Engine:
+def get_engine(
+    uri: str,
+    idle_ping_seconds: float | None = 30,
+    poolclass: type[sa.pool.Pool] | None = None,
+    **pool_options: Any,
+) -> sa.engine.Engine:
     """
-    Return a sqlalchemy engine with pool_pre_ping enabled.
+    Return the cads_catalogue engine, pinging connections only after a period of inactivity.
+
+    The engine is configured by `cads_catalogue.database.ensure_engine`. Its pool is
+    replaced (see `replace_pool`) by one of `poolclass`, with `pool_options` overriding
+    its configuration, and without `pre_ping`: a ping costs a round trip at every
+    checkout, which is a measurable fraction of our (short) queries. Connections are
+    instead validated when idle for more than `idle_ping_seconds` (see
+    `install_idle_ping`). Connections broken anyway are invalidated on error, and
+    `retry_on_disconnect` can be used to retry the operation.
 
     This function may be updated over time to reflect recommended engine configuration
     for use with FastAPI.
     """
-    return cads_catalogue.database.ensure_engine(uri)
+    engine = cads_catalogue.database.ensure_engine(uri)
+    engine.pool = replace_pool(engine.pool, poolclass, pre_ping=False, **pool_options)
+    if idle_ping_seconds is not None:
+        install_idle_ping(engine, idle_ping_seconds)
+    return engine
+
+
+def replace_pool(
+    pool: sa.pool.Pool, poolclass: type[sa.pool.Pool] | None = None, **options: Any
+) -> sa.pool.Pool:
+    """
+    Return a new pool with the configuration of `pool`, except for `options`.
+
+    Same as `Pool.recreate`, which does not take overrides: connections are created in
+    the same way, and event listeners are kept. The pool is of class `poolclass` if set.
+    """
+    arguments = {
+        "creator": pool._creator,
+        "recycle": pool._recycle,
+        "echo": pool.echo,
+        "logging_name": pool._orig_logging_name,
+        "reset_on_return": pool._reset_on_return,
+        "pre_ping": pool._pre_ping,
+        "dialect": pool._dialect,
+        "_dispatch": pool.dispatch,
+    }
+    if isinstance(pool, sa.pool.QueuePool):
+        arguments.update(
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            use_lifo=pool._pool.use_lifo,
+        )
+    pool.dispose()
+    return (poolclass or type(pool))(**{**arguments, **options})
+
+
+def install_idle_ping(engine: sa.engine.Engine, idle_seconds: float) -> None:
+    """
+    Ping pooled connections at checkout, but only if idle for more than `idle_seconds`.
+
+    A failed ping makes the pool discard the connection and check out another one.
+    """
+
+    @sa.event.listens_for(engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        connection_record.info["checkin_time"] = time.monotonic()
+
+    @sa.event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        checkin_time = connection_record.info.get("checkin_time")
+        if checkin_time is None or time.monotonic() - checkin_time < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as exc:
+            raise sa.exc.DisconnectionError() from exc
+
+
+def retry_on_disconnect(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Retry once an idempotent read operation failing because of a stale connection.
+
+    The decorated function must open its own session, so the retry gets a fresh one.
+    Sessions injected by FastAPI (`dependencies.get_session`) outlive the handler and
+    can't be retried: routes using them rely on `install_idle_ping` only, and fail on
+    connections broken without being idle for long.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        try:
+            return func(*args, **kwargs)
+        except sa.exc.DBAPIError as exc:
+            if not exc.connection_invalidated:
+                raise
+            logger.warning("Stale database connection, retrying", error=exc)
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def read_only_execution_options(deferrable: bool = False) -> dict[str, Any]:
+    """
+    Return the connection execution options for a read only transaction.
+
+    All the statements of a transaction share the same snapshot (REPEATABLE READ), so
+    the ids, count and page queries of a request are consistent. Facets share it only
+    when computed in the same session (`Settings.search_concurrency` set to 0):
+    otherwise they run concurrently on another connection, in their own transaction.
+    If `deferrable` is set a SERIALIZABLE READ ONLY DEFERRABLE transaction is used instead,
+    which is not supported on hot standby servers.
+
+    Options are sent along with the BEGIN statement: they don't cost additional round trips.
+    """
+    if deferrable:
+        return {
+            "isolation_level": "SERIALIZABLE",
+            "postgresql_readonly": True,
+            "postgresql_deferrable": True,
+        }
+    return {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
 
 
 def get_sessionmaker_for_engine(engine: sa.engine.Engine) -> sa.orm.sessionmaker:
@@ -139,12 +304,20 @@ def context_session(engine: sa.engine.Engine) -> Iterator[Session]:
     yield from _get_db(sessionmaker)
 
 
-def _get_db(sessionmaker: sa.orm.sessionmaker) -> Iterator[Session]:
-    """Yield an ORM session using the provided sessionmaker, and cleans it up when resumed."""
+def _get_db(
+    sessionmaker: sa.orm.sessionmaker, read_only: bool = False
+) -> Iterator[Session]:
+    """Yield an ORM session using the provided sessionmaker, and cleans it up when resumed.
+
+    Read only sessions are never committed: the transaction is rolled back when the
+    connection is returned to the pool. This costs the same round trip as a commit (a
+    committed connection is not rolled back again), but nothing is written anyway.
+    """
     session = sessionmaker()
     try:
         yield session
-        session.commit()
+        if not read_only:
+            session.commit()
     except Exception as exc:
         session.rollback()
         raise exc
@@ -17,6 +17,9 @@ This largely depends on stac_fastapi to generate the RESTful API.
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import contextlib
+import functools
 from contextlib import asynccontextmanager
 from typing import Any
 
@@ -43,12 +46,18 @@ from . import (
     doi,
     exceptions,
     extensions,
+    memory,
     messages,
+    metrics,
     middlewares,
+    profiling,
     schema_org,
     status,
+    timing,
+    traffic,
     typeahead,
     vocabularies,
+    warmup,
 )
 
 
@@ -56,7 +65,25 @@ from . import (
 async def lifespan(application: fastapi.FastAPI):
     cads_common.logging.structlog_configure()
     cads_common.logging.logging_configure()
+    metrics.configure_threadpool(config.settings.threadpool_size)
+    metrics.CACHE_COLLECTOR.cache_sizes = memory.cache_sizes
+    probe = None
+    if config.settings.threadpool_probe_interval:
+        probe = asyncio.create_task(
+            metrics.probe_threadpool(config.settings.threadpool_probe_interval)
+        )
+    warmup_task = None
+    if config.settings.warmup_enabled:
+        # run in background: the server must answer readiness probes meanwhile
+        warmup_task = asyncio.create_task(warmup.warm_up(application))
+    else:
+        warmup.state.ready = True
     yield
+    for task in (probe, warmup_task):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
 
 
 exts: list[Any] = [
@@ -70,7 +97,12 @@ api = stac_fastapi.api.app.StacApi(
     settings=config.dbsettings,
     extensions=exts,
     client=client.cads_client,
+    response_class=timing.TimedJSONResponse,
+    # each middleware wraps the previous ones: the last one is the outermost
     middlewares=[
+        starlette.middleware.Middleware(middlewares.DeadlineMiddleware),
+        # must be right inside the compression, see ServerTimingMiddleware
+        starlette.middleware.Middleware(middlewares.ResponseStartMiddleware),
         starlette.middleware.Middleware(BrotliMiddleware),
         starlette.middleware.Middleware(PrometheusMiddleware),
         starlette.middleware.Middleware(
@@ -80,7 +112,12 @@ api = stac_fastapi.api.app.StacApi(
             allow_headers=["Content-Type"],
         ),
         starlette.middleware.Middleware(middlewares.CacheControlMiddleware),
+        starlette.middleware.Middleware(middlewares.SQLDebugMiddleware),
+        starlette.middleware.Middleware(middlewares.ProfilingMiddleware),
+        starlette.middleware.Middleware(middlewares.ServerTimingMiddleware),
+        starlette.middleware.Middleware(middlewares.SQLAccountingMiddleware),
         starlette.middleware.Middleware(middlewares.LoggerInitializationMiddleware),
+        starlette.middleware.Middleware(traffic.TrafficCaptureMiddleware),
     ],
     # FIXME: this must be different from site to site
     title="ECMWF Data Stores STAC Catalogue API",
@@ -93,6 +130,8 @@ app = api.app
 # FIXME : "app.router.lifespan_context" is not officially supported and would likely break
 app.router.lifespan_context = lifespan
 app.add_route("/metrics", handle_metrics)
+# encoding of the responses of the routers below is also measured
+app.router.default_response_class = timing.TimedJSONResponse
 app.include_router(vocabularies.router)
 app.include_router(messages.router)
 app.include_router(schema_org.router)
@@ -101,10 +140,15 @@ app.include_router(doi.router)
 app.include_router(contents.router)
 app.include_router(typeahead.router)
 app.include_router(status.router)
+app.include_router(profiling.router)
 
 
+@functools.cache
 def catalogue_openapi() -> dict[str, Any]:
-    """OpenAPI, but with not implemented paths removed."""
+    """OpenAPI, but with not implemented paths removed.
+
+    The schema is generated once: routes don't change after startup.
+    """
     openapi_schema = fastapi.openapi.utils.get_openapi(
         title="ECMWF Data Stores STAC Catalogue",
         version=api.api_version,
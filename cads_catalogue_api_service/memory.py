@@ -0,0 +1,112 @@
+"""Memory footprint of the process and of its in-process caches."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import types
+from collections.abc import Callable
+from typing import Any
+
+from . import dependencies, metrics, resolver, search_utils
+
+# objects shared by the whole process, not accounted in the size of a structure
+SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType)
+
+
+def rss() -> int | None:
+    """Return the resident set size of the process in bytes (None if unknown)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Return the size in bytes of an object and of all the objects it references.
+
+    Containers, instance dictionaries and slots are followed; shared objects (classes,
+    modules, functions) are not accounted. Objects referenced many times are accounted
+    once.
+    """
+    seen: set[int] = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return size
+
+
+def ttl_cache_items(cache: Any) -> list[tuple[Any, Any]]:
+    """Return the entries of a cachetools cache not expired yet."""
+    if hasattr(cache, "expire"):
+        cache.expire()
+    return list(cache.items())
+
+
+def cache_sizes(deep: bool = False) -> dict[str, dict[str, Any]]:
+    """Return number of entries, maximum size and (if `deep`) bytes of in-process caches.
+
+    Computing bytes walks all the cached objects: it's meant for reports, not for
+    frequent scrapes. Entries of ``functools`` caches can't be reached, so their bytes
+    are never reported.
+    """
+    external_search = search_utils.external_search.cache  # type: ignore[attr-defined]
+    caches: dict[str, tuple[int, int | None, Callable[[], Any]]] = {
+        "external_search": (
+            len(external_search),
+            external_search.maxsize,
+            lambda: ttl_cache_items(external_search),
+        ),
+        "resolver_index": (len(resolver.index), None, lambda: resolver.index),
+    }
+    for name, cache in (
+        ("search_ids", search_utils.search_ids_cache),
+        ("facets", search_utils.facets_cache),
+        ("pages", search_utils.pages_cache),
+    ):
+        caches[name] = (len(cache), cache.maxsize, cache.items)
+
+    sizes: dict[str, dict[str, Any]] = {}
+    for name, (entries, maxsize, content) in caches.items():
+        sizes[name] = {"entries": entries, "maxsize": maxsize}
+        if deep:
+            sizes[name]["bytes"] = deep_sizeof(content())
+    for name, function in (
+        ("get_sessionmaker", dependencies.get_sessionmaker),
+        ("keywords_category_filter", search_utils.keywords_category_filter),
+        ("keywords_filter", search_utils.keywords_filter),
+        ("grouped_keywords_filter", search_utils.grouped_keywords_filter),
+        ("timed_pool_class", metrics.timed_pool_class),
+    ):
+        info = function.cache_info()
+        sizes[name] = {"entries": info.currsize, "maxsize": info.maxsize}
+    return sizes
@@ -27,47 +27,66 @@ router = fastapi.APIRouter(
 )
 
 
-def query_messages(
-    session: sa.orm.Session,
+def messages_statement(
     live: bool = True,
     is_global: bool = True,
     collection_id: str | None = None,
     site: str | None = None,
-) -> list[cads_catalogue.database.Message]:
-    """Query messages."""
-    results = (
-        session.query(
-            cads_catalogue.database.Message.message_uid,
-            cads_catalogue.database.Message.date,
-            cads_catalogue.database.Message.summary,
-            cads_catalogue.database.Message.url,
-            cads_catalogue.database.Message.severity,
-            cads_catalogue.database.Message.content,
-            cads_catalogue.database.Message.live,
-            cads_catalogue.database.Message.show_date,
-        )
-        .join(
-            cads_catalogue.database.ResourceMessage,
-            isouter=True,
-        )
-        # FIXME: this can be slow. Please do not load the full dataset.
-        .join(
-            cads_catalogue.database.Resource,
-            full=True,
-        )
-        .where(
-            cads_catalogue.database.Message.live.is_(live),
-            cads_catalogue.database.Message.is_global.is_(is_global),
+) -> sa.StatementLambdaElement:
+    """Return the statement selecting messages.
+
+    Each combination of filters is built (and compiled) only once: filter values are
+    bound parameters.
+    """
+    stmt = sa.lambda_stmt(
+        lambda: (
+            sa.select(
+                cads_catalogue.database.Message.message_uid,
+                cads_catalogue.database.Message.date,
+                cads_catalogue.database.Message.summary,
+                cads_catalogue.database.Message.url,
+                cads_catalogue.database.Message.severity,
+                cads_catalogue.database.Message.content,
+                cads_catalogue.database.Message.live,
+                cads_catalogue.database.Message.show_date,
+            )
+            .join(
+                cads_catalogue.database.ResourceMessage,
+                isouter=True,
+            )
+            # FIXME: this can be slow. Please do not load the full dataset.
+            .join(
+                cads_catalogue.database.Resource,
+                full=True,
+            )
+            .where(
+                cads_catalogue.database.Message.live == live,
+                cads_catalogue.database.Message.is_global == is_global,
+            )
         )
     )
     if site and is_global:
-        results = results.where(cads_catalogue.database.Message.site == site)
+        stmt += lambda s: s.where(cads_catalogue.database.Message.site == site)
     if collection_id:
-        results = results.where(
+        stmt += lambda s: s.where(
             cads_catalogue.database.Resource.resource_uid == collection_id
         )
-    results = results.order_by(sa.desc(cads_catalogue.database.Message.date)).all()  # type: ignore
-    return results  # type: ignore
+    stmt += lambda s: s.order_by(sa.desc(cads_catalogue.database.Message.date))
+    return stmt
+
+
+def query_messages(
+    session: sa.orm.Session,
+    live: bool = True,
+    is_global: bool = True,
+    collection_id: str | None = None,
+    site: str | None = None,
+) -> list[cads_catalogue.database.Message]:
+    """Query messages."""
+    stmt = messages_statement(
+        live=live, is_global=is_global, collection_id=collection_id, site=site
+    )
+    return session.execute(stmt).all()  # type: ignore
 
 
 @router.get("/collections/{collection_id}/messages", response_model=models.Messages)
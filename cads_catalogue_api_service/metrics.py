@@ -0,0 +1,253 @@
+"""Prometheus metrics exported by the service on /metrics."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import time
+from collections.abc import Callable
+from typing import Any, Protocol
+
+import anyio
+import anyio.to_thread
+import prometheus_client
+import prometheus_client.core
+import prometheus_client.registry
+import sqlalchemy as sa
+
+from . import sqllog, timing
+
+NEGATIVE_LOOKUPS = prometheus_client.Counter(
+    "catalogue_negative_lookups",
+    "Requests for unknown datasets answered without querying the database",
+    ["route"],
+)
+
+PAGE_PREFETCHES = prometheus_client.Counter(
+    "catalogue_page_prefetches",
+    "Next pages of dataset searches computed in background",
+    ["outcome"],
+)
+PAGE_PREFETCH_HITS = prometheus_client.Counter(
+    "catalogue_page_prefetch_hits",
+    "Pages of dataset searches served from a prefetched page",
+)
+
+DB_STATEMENT_SECONDS = prometheus_client.Histogram(
+    "catalogue_db_statement_seconds",
+    "Execution time of SQL statements",
+    ["database"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+REQUEST_PHASE_SECONDS = prometheus_client.Histogram(
+    "catalogue_request_phase_seconds",
+    "Time spent by requests in each phase (see the Server-Timing header)",
+    ["phase"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+REQUEST_SQL_STATEMENTS = prometheus_client.Histogram(
+    "catalogue_request_sql_statements",
+    "Number of SQL statements executed by a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500),
+)
+REQUEST_SQL_SECONDS = prometheus_client.Histogram(
+    "catalogue_request_sql_seconds",
+    "Total execution time of the SQL statements of a request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_POOL_CHECKOUT_SECONDS = prometheus_client.Histogram(
+    "catalogue_db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the pool (connection setup included)",
+    ["database"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_SESSIONS = prometheus_client.Counter(
+    "catalogue_db_sessions",
+    "Sessions opened on each database (replicas included)",
+    ["database"],
+)
+THREADPOOL_QUEUE_SECONDS = prometheus_client.Histogram(
+    "catalogue_threadpool_queue_seconds",
+    "Time a probe task waited for a worker thread",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+DB_REPLICA_HEALTHY = prometheus_client.Gauge(
+    "catalogue_db_replica_healthy",
+    "Whether a read replica is currently used for reads",
+    ["database"],
+)
+DB_REPLICA_LAG = prometheus_client.Gauge(
+    "catalogue_db_replica_lag_seconds",
+    "Last measured replication lag of a read replica",
+    ["database"],
+)
+
+
+def instrument_engine(engine: sa.engine.Engine, database: str) -> None:
+    """Observe the execution time of all the statements run by the engine.
+
+    Slow statements are logged, see `sqllog`.
+    """
+
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context.statement_start = time.perf_counter()
+
+    @sa.event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - context.statement_start
+        DB_STATEMENT_SECONDS.labels(database=database).observe(elapsed)
+        timing.add_statement(elapsed)
+        sqllog.observe(conn, statement, parameters, elapsed)
+
+
+@functools.cache
+def timed_pool_class(database: str) -> type[sa.pool.QueuePool]:
+    """Return a `QueuePool` class observing the time spent waiting for a connection.
+
+    A class is built for each database, as pools are recreated (with the same class) when
+    the engine is disposed.
+    """
+    histogram = DB_POOL_CHECKOUT_SECONDS.labels(database=database)
+
+    class TimedQueuePool(sa.pool.QueuePool):
+        def _do_get(self) -> Any:
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                elapsed = time.perf_counter() - start
+                histogram.observe(elapsed)
+                timing.add("pool", elapsed)
+
+    return TimedQueuePool
+
+
+class PooledSessionMaker(Protocol):
+    name: str
+
+    def pool_statistics(self) -> dict[str, int] | None: ...
+
+
+class PoolCollector(prometheus_client.registry.Collector):
+    """Collect connection pool statistics of the registered session makers at scrape time."""
+
+    def __init__(self) -> None:
+        self.session_makers: dict[str, PooledSessionMaker] = {}
+
+    def register(self, session_maker: PooledSessionMaker) -> None:
+        self.session_makers[session_maker.name] = session_maker
+
+    def collect(self) -> Any:
+        families = {
+            key: prometheus_client.core.GaugeMetricFamily(
+                f"catalogue_db_pool_{key}", documentation, labels=["database"]
+            )
+            for key, documentation in (
+                ("size", "Configured number of connections kept in the pool"),
+                ("checked_in", "Idle connections available in the pool"),
+                ("checked_out", "Connections currently checked out from the pool"),
+                ("overflow", "Connections opened beyond the pool size"),
+            )
+        }
+        for name, session_maker in self.session_makers.items():
+            statistics = session_maker.pool_statistics()
+            if statistics is None:
+                continue
+            for key, family in families.items():
+                family.add_metric([name], statistics[key])
+        yield from families.values()
+
+
+class ThreadpoolCollector(prometheus_client.registry.Collector):
+    """Collect the occupancy of the threadpool running sync endpoints and dependencies.
+
+    The anyio limiter can only be retrieved from the event loop: it's set at startup.
+    """
+
+    def __init__(self) -> None:
+        self.limiter: anyio.CapacityLimiter | None = None
+
+    def collect(self) -> Any:
+        if self.limiter is None:
+            return
+        statistics = self.limiter.statistics()
+        for name, documentation, value in (
+            ("size", "Maximum number of worker threads", statistics.total_tokens),
+            ("busy", "Worker threads currently in use", statistics.borrowed_tokens),
+            ("waiting", "Tasks waiting for a worker thread", statistics.tasks_waiting),
+        ):
+            yield prometheus_client.core.GaugeMetricFamily(
+                f"catalogue_threadpool_{name}", documentation, value=value
+            )
+
+
+class CacheCollector(prometheus_client.registry.Collector):
+    """Collect entries and maximum size of the in-process caches at scrape time.
+
+    The function listing the caches (`memory.cache_sizes`) is set at startup.
+    """
+
+    def __init__(self) -> None:
+        self.cache_sizes: Callable[[], dict[str, dict[str, Any]]] | None = None
+
+    def collect(self) -> Any:
+        if self.cache_sizes is None:
+            return
+        entries = prometheus_client.core.GaugeMetricFamily(
+            "catalogue_cache_entries", "Entries of in-process caches", labels=["cache"]
+        )
+        maxsize = prometheus_client.core.GaugeMetricFamily(
+            "catalogue_cache_maxsize",
+            "Maximum number of entries of in-process caches",
+            labels=["cache"],
+        )
+        for name, sizes in self.cache_sizes().items():
+            entries.add_metric([name], sizes["entries"])
+            if sizes["maxsize"] is not None:
+                maxsize.add_metric([name], sizes["maxsize"])
+        yield entries
+        yield maxsize
+
+
+POOL_COLLECTOR = PoolCollector()
+prometheus_client.REGISTRY.register(POOL_COLLECTOR)
+THREADPOOL_COLLECTOR = ThreadpoolCollector()
+prometheus_client.REGISTRY.register(THREADPOOL_COLLECTOR)
+CACHE_COLLECTOR = CacheCollector()
+prometheus_client.REGISTRY.register(CACHE_COLLECTOR)
+
+
+def configure_threadpool(size: int | None = None) -> anyio.CapacityLimiter:
+    """Set the size of the default threadpool (if given) and collect its statistics.
+
+    Must be called from the event loop (i.e. at startup).
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if size is not None:
+        limiter.total_tokens = size
+    THREADPOOL_COLLECTOR.limiter = limiter
+    return limiter
+
+
+async def probe_threadpool(interval: float) -> None:
+    """Periodically measure how long a new task waits for a worker thread."""
+    while True:
+        start = time.perf_counter()
+        started_at = await anyio.to_thread.run_sync(time.perf_counter)
+        THREADPOOL_QUEUE_SECONDS.observe(started_at - start)
+        await asyncio.sleep(interval)
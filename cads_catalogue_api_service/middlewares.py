@@ -14,13 +14,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import random
+import secrets
+import time
 import uuid
 
 import fastapi
 import starlette
 import structlog
 
-from cads_catalogue_api_service import config
+from cads_catalogue_api_service import (
+    config,
+    deadline,
+    metrics,
+    profiling,
+    sqllog,
+    timing,
+)
+
+logger = structlog.getLogger(__name__)
 
 
 # See https://github.com/snok/asgi-correlation-id/blob/5a7be6337f3b33b84a00d03baae3da999bb722d5/asgi_correlation_id/middleware.py  # noqa: E501
@@ -83,6 +96,297 @@ class LoggerInitializationMiddleware:
         await self.app(scope, receive, send_with_trace_id)
 
 
+class SQLAccountingMiddleware:
+    """Account the SQL statements executed by each request.
+
+    Number of statements and their total execution time are logged (bound to the trace
+    ID, so this must be wrapped by `LoggerInitializationMiddleware`) and observed by
+    histograms labelled by route template.
+    Statements run by background tasks of the request after it completes (e.g. page
+    prefetching) are not accounted.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = timing.current.get()
+        token = None
+        if timings is None:
+            timings = timing.Timings()
+            token = timing.current.set(timings)
+        scope_token = sqllog.current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sqllog.current_scope.reset(scope_token)
+            if token is not None:
+                timing.current.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "<unmatched>")
+            db_time = timings.phases.get("db", 0.0)
+            metrics.REQUEST_SQL_STATEMENTS.labels(route=route_path).observe(
+                timings.statements
+            )
+            metrics.REQUEST_SQL_SECONDS.labels(route=route_path).observe(db_time)
+            logger.info(
+                "Request SQL statements",
+                route=route_path,
+                sql_statements=timings.statements,
+                sql_time=db_time,
+            )
+
+
+class SQLDebugMiddleware:
+    """Answer requests with the SQL debug header with their statements and timings.
+
+    The header must be set to `Settings.sql_debug_token` (disabled if None). The
+    response of the application is replaced by the executed statements (with
+    parameters, execution time and EXPLAIN ANALYZE output), and the timings of the
+    request phases. This must be wrapped by `ServerTimingMiddleware`, and wrap the
+    compression middleware.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    def is_debugged(self, scope: starlette.types.Scope) -> bool:
+        token = config.settings.sql_debug_token
+        if scope["type"] != "http" or not token:
+            return False
+        value = starlette.datastructures.Headers(scope=scope).get(
+            config.settings.sql_debug_header
+        )
+        return value is not None and secrets.compare_digest(
+            value.encode(), token.encode()
+        )
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if not self.is_debugged(scope):
+            return await self.app(scope, receive, send)
+
+        statements: list[dict] = []
+        token = sqllog.recorded.set(statements)
+        status = {"code": 500}
+
+        async def send_discarding(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_discarding)
+        finally:
+            sqllog.recorded.reset(token)
+        timings = timing.current.get()
+        body = json.dumps(
+            {
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status["code"],
+                "total": time.perf_counter() - start,
+                "phases": dict(timings.phases) if timings is not None else {},
+                "sql_statements": len(statements),
+                "sql_time": sum(statement["seconds"] for statement in statements),
+                "statements": statements,
+            },
+            default=str,
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"cache-control", b"no-store"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class ProfilingMiddleware:
+    """Answer requests with the profiling header with their sampled stacks.
+
+    The header must be set to `Settings.profiling_token` (disabled if None). The
+    response of the application is replaced by the folded stacks sampled while it was
+    computed (see `profiling`), or by a 409 if another profile is running. All the
+    threads are sampled: concurrent requests are profiled as well. This must wrap the
+    compression middleware, to profile compression. Requests for the worker profile
+    endpoint are passed through.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if (
+            scope["type"] != "http"
+            # the worker profile endpoint runs its own sampler
+            or profiling.is_profile_endpoint(scope)
+            or not profiling.authorized(
+                starlette.datastructures.Headers(scope=scope).get(
+                    config.settings.profiling_header
+                )
+            )
+        ):
+            return await self.app(scope, receive, send)
+
+        if not profiling.active.acquire(blocking=False):
+            response = starlette.responses.PlainTextResponse(
+                "Profile already running\n", status_code=409
+            )
+            return await response(scope, receive, send)
+
+        async def send_discarding(message):
+            pass
+
+        try:
+            sampler = profiling.Sampler()
+            sampler.start()
+            try:
+                await self.app(scope, receive, send_discarding)
+            finally:
+                sampler.stop()
+        finally:
+            profiling.active.release()
+        response = starlette.responses.PlainTextResponse(
+            sampler.folded(), headers={"cache-control": "no-store"}
+        )
+        await response(scope, receive, send)
+
+
+class DeadlineMiddleware:
+    """Start the time budget of each request, and report degraded responses.
+
+    Responses missing parts to respect the budget get the `X-Partial-Response` header,
+    listing the degraded features, and are not cached.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_deadline = deadline.Deadline(config.settings.request_time_budget)
+        scope.setdefault("state", {})["deadline"] = request_deadline
+
+        async def send_with_degradation(message):
+            if message["type"] == "http.response.start" and request_deadline.degraded:
+                headers = starlette.datastructures.MutableHeaders(scope=message)
+                headers[deadline.PARTIAL_RESPONSE_HEADER_NAME] = ", ".join(
+                    request_deadline.degraded
+                )
+                headers["cache-control"] = "no-store"
+            await send(message)
+
+        await self.app(scope, receive, send_with_degradation)
+
+
+class ServerTimingMiddleware:
+    """Measure the phases of each request, see `timing`.
+
+    Phases are observed by the `catalogue_request_phase_seconds` histogram, and reported
+    in the Server-Timing header of sampled requests and of requests with the debug
+    header. This must wrap the compression middleware, wrapping in turn
+    `ResponseStartMiddleware`: the time between the two is the compression time.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        # reuse the timings started by SQLAccountingMiddleware, if wrapped by it
+        timings = timing.current.get()
+        token = None
+        if timings is None:
+            timings = timing.Timings()
+            token = timing.current.set(timings)
+        report = (
+            config.settings.server_timing_debug_header
+            in starlette.datastructures.Headers(scope=scope)
+            or random.random() < config.settings.server_timing_sample_rate
+        )
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if timings.response_start is not None:
+                    timings.add("compress", now - timings.response_start)
+                for phase, seconds in timings.phases.items():
+                    metrics.REQUEST_PHASE_SECONDS.labels(phase=phase).observe(seconds)
+                if report:
+                    timings.add("total", now - start)
+                    headers = starlette.datastructures.MutableHeaders(scope=message)
+                    headers.append(timing.SERVER_TIMING_HEADER_NAME, timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if token is not None:
+                timing.current.reset(token)
+
+
+class ResponseStartMiddleware:
+    """Record when the application starts the response (see `ServerTimingMiddleware`)."""
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        timings = timing.current.get()
+        if scope["type"] != "http" or timings is None:
+            return await self.app(scope, receive, send)
+
+        async def send_marking_start(message):
+            if message["type"] == "http.response.start":
+                timings.response_start = time.perf_counter()
+            await send(message)
+
+        await self.app(scope, receive, send_marking_start)
+
+
 CACHEABLE_HTTP_METHODS = ["GET", "HEAD"]
 
 
@@ -0,0 +1,144 @@
+"""On-demand sampling profiler of the worker, reporting folded stacks (flame graphs).
+
+Stacks of all the threads are sampled at a fixed interval by a background thread, only
+while a profile is running: there is no overhead otherwise. Reports are in the folded
+stacks format (one ``frame;frame;frame count`` line per stack), read by flame graph
+tools such as ``flamegraph.pl`` and speedscope.
+"""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import secrets
+import sys
+import threading
+import types
+
+import fastapi
+import fastapi.responses
+
+from . import config
+
+# leaf frames of idle threads (waiting for work or events), not reported
+IDLE_FRAMES = {"threading:wait", "selectors:select", "threading:_wait_for_tstate_lock"}
+
+# path of the worker profile endpoint (relative to the root path)
+PROFILE_PATH = "/profile"
+
+# only one profile runs at a time
+active = threading.Lock()
+
+router = fastapi.APIRouter()
+
+
+def frame_name(frame: types.FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def folded_stack(frame: types.FrameType) -> tuple[str, ...]:
+    """Return the names of the frames of a stack, outermost first."""
+    names = []
+    current: types.FrameType | None = frame
+    while current is not None:
+        names.append(frame_name(current))
+        current = current.f_back
+    return tuple(reversed(names))
+
+
+class Sampler:
+    """Count the stacks of all the threads every `interval` seconds, while running."""
+
+    def __init__(self, interval: float | None = None) -> None:
+        self.interval = interval or config.settings.profiling_interval
+        self.stacks: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        own_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = folded_stack(frame)
+            if stack[-1] not in IDLE_FRAMES:
+                self.stacks[stack] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Return the sampled stacks in the folded stacks format."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+
+def authorized(value: str | None) -> bool:
+    """Check a value of the profiling header against `Settings.profiling_token`."""
+    token = config.settings.profiling_token
+    return (
+        bool(token)
+        and value is not None
+        and secrets.compare_digest(value.encode(), token.encode())
+    )
+
+
+def is_profile_endpoint(scope: dict) -> bool:
+    """Return True if the request is for the worker profile endpoint."""
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path) :]
+    return path == PROFILE_PATH
+
+
+@router.get(PROFILE_PATH, include_in_schema=False)
+async def profile_worker(
+    request: fastapi.Request,
+    seconds: float = fastapi.Query(default=10, gt=0),
+) -> fastapi.responses.PlainTextResponse:
+    """Profile this worker for `seconds` seconds (see `Settings.profiling_max_seconds`)."""
+    if not config.settings.profiling_token:
+        raise fastapi.HTTPException(status_code=404, detail="Not Found")
+    if not authorized(request.headers.get(config.settings.profiling_header)):
+        raise fastapi.HTTPException(status_code=403, detail="Forbidden")
+    if not active.acquire(blocking=False):
+        raise fastapi.HTTPException(status_code=409, detail="Profile already running")
+    try:
+        sampler = Sampler()
+        sampler.start()
+        try:
+            await asyncio.sleep(min(seconds, config.settings.profiling_max_seconds))
+        finally:
+            sampler.stop()
+    finally:
+        active.release()
+    return fastapi.responses.PlainTextResponse(
+        sampler.folded(), headers={"cache-control": "no-store"}
+    )
@@ -0,0 +1,179 @@
+"""Replay of captured traffic (see `traffic`), reporting throughput and latencies per route.
+
+Usage:
+
+    python -m cads_catalogue_api_service.replay traffic.jsonl --concurrency 16 --speedup 10
+    python -m cads_catalogue_api_service.replay traffic.jsonl --base-url http://localhost:8000
+
+Without ``--base-url`` requests are sent in-process to the ASGI application.
+"""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any
+
+import attrs
+import httpx
+
+from . import config
+
+
+@attrs.define
+class Result:
+    route: str
+    status: int | None
+    latency: float
+
+
+def load_lines(path: str) -> list[dict[str, Any]]:
+    with open(path, encoding="utf-8") as file:
+        lines = [json.loads(line) for line in file if line.strip()]
+    return sorted(lines, key=lambda line: line["timestamp"])
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def request_url_headers(line: dict[str, Any]) -> tuple[str, dict[str, str]]:
+    """Return URL (relative) and headers of the request of a captured line."""
+    headers = {
+        name: line[key]
+        for key, name in (
+            ("portal", config.PORTAL_HEADER_NAME),
+            ("site", config.SITE_HEADER_NAME),
+        )
+        if line.get(key)
+    }
+    return line["path"] + (f"?{line['query']}" if line.get("query") else ""), headers
+
+
+def summarize(results: list[Result], duration: float) -> dict[str, Any]:
+    """Return throughput, and error rate and latency percentiles for each route."""
+    routes: dict[str, list[Result]] = {}
+    for result in results:
+        routes.setdefault(result.route, []).append(result)
+    report: dict[str, Any] = {
+        "requests": len(results),
+        "duration": round(duration, 3),
+        "throughput": round(len(results) / duration, 2) if duration else None,
+        "routes": {},
+    }
+    for route, route_results in sorted(routes.items()):
+        latencies = sorted(result.latency for result in route_results)
+        errors = sum(
+            1
+            for result in route_results
+            if result.status is None or result.status >= 500
+        )
+        report["routes"][route] = {
+            "requests": len(route_results),
+            "error_rate": round(errors / len(route_results), 4),
+            "mean": round(statistics.fmean(latencies), 6),
+            "p50": round(percentile(latencies, 0.50), 6),
+            "p90": round(percentile(latencies, 0.90), 6),
+            "p99": round(percentile(latencies, 0.99), 6),
+        }
+    return report
+
+
+async def replay(
+    lines: list[dict[str, Any]],
+    client: httpx.AsyncClient,
+    concurrency: int = 8,
+    speedup: float | None = None,
+) -> dict[str, Any]:
+    """Send the captured requests, at most `concurrency` at a time.
+
+    With `speedup`, requests are sent at their original pace accelerated by `speedup`
+    (when concurrency allows it), otherwise as fast as possible.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[Result] = []
+    first_timestamp = lines[0]["timestamp"] if lines else 0
+    start = time.perf_counter()
+
+    async def send(line: dict[str, Any]) -> None:
+        url, headers = request_url_headers(line)
+        async with semaphore:
+            request_start = time.perf_counter()
+            try:
+                response = await client.request(line["method"], url, headers=headers)
+                status: int | None = response.status_code
+            except httpx.HTTPError:
+                status = None
+            results.append(
+                Result(
+                    route=line.get("route") or line["path"],
+                    status=status,
+                    latency=time.perf_counter() - request_start,
+                )
+            )
+
+    tasks = []
+    for line in lines:
+        if speedup:
+            delay = (line["timestamp"] - first_timestamp) / speedup
+            await asyncio.sleep(max(delay - (time.perf_counter() - start), 0))
+        tasks.append(asyncio.create_task(send(line)))
+    await asyncio.gather(*tasks)
+    return summarize(results, time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    lines = load_lines(args.path)
+    if args.base_url:
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport()
+        base_url = args.base_url
+    else:
+        from .main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://replay"
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=args.timeout
+    ) as client:
+        return await replay(
+            lines, client, concurrency=args.concurrency, speedup=args.speedup
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="file of captured request lines")
+    parser.add_argument(
+        "--base-url", help="URL of a running service (in-process if not set)"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--speedup",
+        type=float,
+        default=None,
+        help="replay at the original pace accelerated by this factor "
+        "(as fast as possible if not set)",
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
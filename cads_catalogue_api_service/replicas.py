@@ -0,0 +1,178 @@
+"""Load balancing of read only sessions among many database replicas."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .fastapisessionmaker import FastAPISessionMaker
+
+logger = structlog.getLogger(__name__)
+
+# Lag is zero when everything received is replayed, even if the primary is idle
+REPLICA_LAG_QUERY = sa.text(
+    "SELECT CASE"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+def is_connection_failure(exc: sa.exc.DBAPIError) -> bool:
+    """Return True if the database can't be reached, False for errors of a statement."""
+    # errors connecting are not bound to a statement, lost connections are invalidated
+    return exc.connection_invalidated or exc.statement is None
+
+
+class Replica:
+    """A read replica, with its health state."""
+
+    def __init__(self, session_maker: FastAPISessionMaker) -> None:
+        self.session_maker = session_maker
+        self.unhealthy_until = 0.0
+        self.lag: float | None = None
+        self.lag_checked_at: float | None = None
+        self._lag_lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.session_maker.name
+
+    def checked_out(self) -> int:
+        statistics = self.session_maker.pool_statistics()
+        return statistics["checked_out"] if statistics else 0
+
+    def mark_unhealthy(self, retry_after: float, reason: str) -> None:
+        logger.warning(
+            "Read replica marked as unhealthy", replica=self.name, reason=reason
+        )
+        self.unhealthy_until = time.monotonic() + retry_after
+        metrics.DB_REPLICA_HEALTHY.labels(database=self.name).set(0)
+
+    def check_lag(self) -> float:
+        with self.session_maker.cached_engine.connect() as connection:
+            lag = float(connection.execute(REPLICA_LAG_QUERY).scalar() or 0)
+        metrics.DB_REPLICA_LAG.labels(database=self.name).set(lag)
+        return lag
+
+    def is_available(
+        self,
+        now: float,
+        retry_after: float,
+        max_lag: float | None,
+        lag_check_interval: float,
+    ) -> bool:
+        if now < self.unhealthy_until:
+            return False
+        if max_lag is not None and (
+            self.lag_checked_at is None
+            or now - self.lag_checked_at > lag_check_interval
+        ):
+            # only one thread checks the lag, others keep using the last known value
+            if self._lag_lock.acquire(blocking=False):
+                try:
+                    self.lag_checked_at = now
+                    self.lag = self.check_lag()
+                except sa.exc.DBAPIError as exc:
+                    self.mark_unhealthy(retry_after, reason=str(exc))
+                    return False
+                finally:
+                    self._lag_lock.release()
+        if max_lag is not None and self.lag is not None and self.lag > max_lag:
+            metrics.DB_REPLICA_HEALTHY.labels(database=self.name).set(0)
+            return False
+        metrics.DB_REPLICA_HEALTHY.labels(database=self.name).set(1)
+        return True
+
+
+class ReplicaSessionMaker:
+    """
+    Provide read only sessions balanced among many read replicas.
+
+    Every new session is opened on the available replica with the least checked out
+    connections. Replicas failing to connect (or losing connections) are excluded for
+    `retry_after` seconds, and replicas lagging more than `max_lag` seconds (checked
+    every `lag_check_interval` seconds) are excluded until they catch up.
+    When no replica is available the `fallback` database (usually the primary) is used.
+
+    This exposes the same interface of `FastAPISessionMaker`.
+    """
+
+    def __init__(
+        self,
+        replicas: list[FastAPISessionMaker],
+        fallback: FastAPISessionMaker,
+        retry_after: float = 30,
+        max_lag: float | None = None,
+        lag_check_interval: float = 10,
+    ) -> None:
+        self.replicas = [Replica(session_maker) for session_maker in replicas]
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.read_only = True
+
+    @property
+    def session_makers(self) -> list[FastAPISessionMaker]:
+        """All the underlying session makers, fallback included."""
+        return [replica.session_maker for replica in self.replicas] + [self.fallback]
+
+    def choose(self) -> Replica | None:
+        """Return the available replica with the least checked out connections."""
+        now = time.monotonic()
+        available = [
+            replica
+            for replica in self.replicas
+            if replica.is_available(
+                now, self.retry_after, self.max_lag, self.lag_check_interval
+            )
+        ]
+        if not available:
+            return None
+        return min(available, key=lambda replica: replica.checked_out())
+
+    def get_db(self) -> Iterator[Session]:
+        """Yield a sqlalchemy orm session opened on a replica (see `FastAPISessionMaker.get_db`)."""
+        replica = self.choose()
+        if replica is None:
+            logger.warning("No read replica available, using the fallback database")
+            metrics.DB_SESSIONS.labels(database=self.fallback.name).inc()
+            yield from self.fallback.get_db()
+            return
+        metrics.DB_SESSIONS.labels(database=replica.name).inc()
+        try:
+            yield from replica.session_maker.get_db()
+        except sa.exc.OperationalError as exc:
+            if is_connection_failure(exc):
+                replica.mark_unhealthy(self.retry_after, reason=str(exc))
+            raise
+
+    @contextmanager
+    def context_session(self) -> Iterator[Session]:
+        """Context-manager wrapped version of the `get_db` method."""
+        yield from self.get_db()
+
+    def reset_cache(self) -> None:
+        """Reset the engine and sessionmaker caches of all the databases."""
+        for session_maker in self.session_makers:
+            session_maker.reset_cache()
@@ -0,0 +1,204 @@
+"""In-memory index used to resolve datasets by id or DOI without loading them."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+from typing import Any
+
+import attrs
+import sqlalchemy as sa
+import structlog
+
+from . import config, database, dependencies
+
+logger = structlog.getLogger(__name__)
+
+
+@attrs.frozen
+class ResolverEntry:
+    """The few dataset properties needed to resolve redirects."""
+
+    resource_uid: str
+    doi: str | None = None
+    form: str | None = None
+    constraints: str | None = None
+    portal: str | None = None
+
+
+def query_entries(session: sa.orm.Session) -> list[Any]:
+    """Load the resolver columns of all datasets."""
+    return session.query(*database.RESOLVER_COLUMNS).all()
+
+
+class ResolverIndex:
+    """Map dataset ids and DOIs to the related `ResolverEntry`.
+
+    The index is lazily (re)loaded when the catalogue version changes. The catalogue version
+    is checked at most once every ``check_interval`` seconds, and before reporting a
+    dataset as unknown at most once every ``recheck_interval`` seconds (see `confirm_miss`).
+    """
+
+    def __init__(self, check_interval: int, recheck_interval: float = 1) -> None:
+        self.check_interval = check_interval
+        self.recheck_interval = recheck_interval
+        self.version: tuple | None = None
+        self.loaded = False
+        self._entries: dict[str, ResolverEntry] = {}
+        self._by_doi: dict[str, ResolverEntry] = {}
+        self._known_dois: set[str] = set()
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def load(self, rows: list[Any], version: tuple | None = None) -> None:
+        """Replace the index content with the given rows."""
+        entries = {
+            row.resource_uid: ResolverEntry(
+                resource_uid=row.resource_uid,
+                doi=row.doi,
+                form=row.form,
+                constraints=row.constraints,
+                portal=row.portal,
+            )
+            for row in rows
+        }
+        by_doi: dict[str, ResolverEntry] = {}
+        duplicated_dois = set()
+        for entry in entries.values():
+            if not entry.doi:
+                continue
+            if entry.doi in by_doi:
+                duplicated_dois.add(entry.doi)
+            by_doi[entry.doi] = entry
+        # ambiguous DOIs are left to the database fallback, which reports the error
+        for doi in duplicated_dois:
+            del by_doi[doi]
+        self._known_dois = set(by_doi) | duplicated_dois
+        self._entries, self._by_doi = entries, by_doi
+        self.version = version
+        self.loaded = True
+
+    def refresh(self, session: sa.orm.Session) -> None:
+        """Reload the index if the catalogue changed since the last load."""
+        version = database.query_catalogue_version(session)
+        if not self.loaded or version != self.version:
+            self.load(query_entries(session), version=version)
+            logger.info(
+                "Resolver index loaded", entries=len(self._entries), version=version
+            )
+
+    def ensure_fresh(self) -> None:
+        """Refresh the index (opening a new session) if the check interval elapsed.
+
+        Only one thread refreshes the index at a time; others keep using the current content.
+        Errors are logged and never propagated: callers fall back to the database.
+        """
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.check_interval
+        ):
+            return
+        self.check()
+
+    def check(self) -> bool:
+        """Check the catalogue version now, reloading the index if it changed.
+
+        Return False if the check was not done: already running in another thread, or
+        failed (errors are logged).
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked_at = time.monotonic()
+            with dependencies.get_sessionmaker(
+                read_only=True
+            ).context_session() as session:
+                self.refresh(session)
+            return True
+        except Exception as exc:
+            logger.error("Resolver index refresh failed", error=exc)
+            return False
+        finally:
+            self._lock.release()
+
+    def confirm_miss(self) -> bool:
+        """Check the catalogue version before reporting a missing dataset as unknown.
+
+        Checks are shared by all requests: misses within ``recheck_interval`` seconds of
+        the last check are confirmed without querying, so a stream of unknown ids costs
+        at most one version query per interval. Staleness is bounded by the interval.
+        Return False if the index can't confirm the miss (the caller queries instead).
+        """
+        checked_at = self._checked_at
+        if (
+            checked_at is not None
+            and time.monotonic() - checked_at < self.recheck_interval
+        ):
+            return True
+        return self.check()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self) -> None:
+        """Force a catalogue version check on next access."""
+        self._checked_at = None
+
+    def get(self, resource_uid: str) -> ResolverEntry | None:
+        """Return the entry for the given dataset id, if indexed."""
+        self.ensure_fresh()
+        return self._entries.get(resource_uid)
+
+    def get_by_doi(self, doi: str) -> ResolverEntry | None:
+        """Return the entry for the given DOI, if indexed."""
+        self.ensure_fresh()
+        return self._by_doi.get(doi)
+
+    def is_unknown(self, resource_uid: str, portals: list[str] | None = None) -> bool:
+        """Return True if the dataset surely does not exist (in the given portals).
+
+        When the index is not loaded (or the fast path is disabled) nothing is known for sure.
+        Datasets missing from the index are confirmed by a recent catalogue version check
+        (see `confirm_miss`).
+        """
+        if not config.caches_settings.negative_lookup_enabled:
+            return False
+        entry = self.get(resource_uid)
+        if not self.loaded:
+            return False
+        if entry is not None and not (portals and entry.portal not in portals):
+            return False
+        # the dataset may have been published since the last check
+        if not self.confirm_miss():
+            return False
+        entry = self._entries.get(resource_uid)
+        return entry is None or bool(portals and entry.portal not in portals)
+
+    def is_unknown_doi(self, doi: str) -> bool:
+        """Return True if no dataset surely exists with the given DOI."""
+        if not config.caches_settings.negative_lookup_enabled:
+            return False
+        self.ensure_fresh()
+        if not self.loaded or doi in self._known_dois:
+            return False
+        # the DOI may have been published since the last check, see `is_unknown`
+        return self.confirm_miss() and doi not in self._known_dois
+
+
+index = ResolverIndex(
+    check_interval=config.caches_settings.resolver_check_interval,
+    recheck_interval=config.caches_settings.negative_lookup_recheck_interval,
+)
@@ -25,7 +25,7 @@ import stac_fastapi.types.core
 
 from cads_catalogue_api_service.client import collection_serializer
 
-from . import dependencies, models
+from . import database, dependencies, metrics, models, resolver
 
 router = fastapi.APIRouter(
     prefix="",
@@ -53,6 +53,10 @@ def query_collection(
 ) -> stac_fastapi.types.stac.Collection:
     return collection_serializer(
         session.query(cads_catalogue.database.Resource)
+        .options(
+            *database.load_only("schema_org"),
+            sa.orm.selectinload(cads_catalogue.database.Resource.licences),
+        )
         .filter(cads_catalogue.database.Resource.resource_uid == collection_id)
         .one(),
         session=session,
@@ -86,6 +90,12 @@ def schema_org_json_ld(
 
     See https://developers.google.com/search/docs/appearance/structured-data/dataset
     """
+    if resolver.index.is_unknown(collection_id):
+        metrics.NEGATIVE_LOOKUPS.labels(route="schema.org").inc()
+        raise fastapi.HTTPException(
+            status_code=fastapi.status.HTTP_404_NOT_FOUND,
+            detail=f"Resource {collection_id} not found.",
+        )
     try:
         collection = query_collection(session, collection_id, request)
     except sa.orm.exc.NoResultFound:
@@ -14,6 +14,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+import threading
 from typing import Any
 
 import cachetools
@@ -24,7 +26,7 @@ import stac_fastapi.types
 import stac_fastapi.types.stac
 import structlog
 
-from . import config
+from . import config, timing
 
 # TODO: this should be placed in a configuration file
 WEIGHT_HIGH_PRIORITY_TERMS = 1.0
@@ -139,6 +141,68 @@ def fulltext_order_by(q: str):
     ).desc()
 
 
+@functools.cache
+def keywords_category_filter(index: int) -> sa.ColumnElement[bool]:
+    """Return the filter clause of the `index`-th category of keywords.
+
+    The dataset is required to have at least one of the keywords of the category, passed
+    as the ``kw_<index>`` expanding bound parameter: the clause (and its compiled form)
+    is built once.
+    """
+    # Manually build many to many relation
+    return cads_catalogue.database.Resource.resource_id.in_(
+        sa.select(cads_catalogue.database.ResourceFacet.resource_id).where(
+            cads_catalogue.database.ResourceFacet.facet_id.in_(
+                sa.select(cads_catalogue.database.Facet.facet_id).where(
+                    cads_catalogue.database.Facet.facet_name.in_(
+                        sa.bindparam(f"kw_{index}", expanding=True)
+                    )
+                )
+            )
+        )
+    )
+
+
+@functools.cache
+def keywords_filter(categories: int) -> sa.ColumnElement[bool]:
+    """Return the keywords filter clause for the given number of categories.
+
+    One IN subquery per category (see `keywords_category_filter`), in the same query.
+    """
+    return sa.and_(*(keywords_category_filter(index) for index in range(categories)))
+
+
+@functools.cache
+def grouped_keywords_filter(categories: int) -> sa.ColumnElement[bool]:
+    """Return the keywords filter clause for the given number of categories, as a single pass.
+
+    Facets of datasets having at least one of the requested keywords (``kw_all``) are
+    grouped by dataset, then each category requires (``HAVING``) one of its keywords
+    (``kw_<n>``) among them. Semantics are the same of `keywords_filter`.
+    """
+    facet_name = cads_catalogue.database.Facet.facet_name
+    return cads_catalogue.database.Resource.resource_id.in_(
+        sa.select(cads_catalogue.database.ResourceFacet.resource_id)
+        .join(
+            cads_catalogue.database.Facet,
+            cads_catalogue.database.Facet.facet_id
+            == cads_catalogue.database.ResourceFacet.facet_id,
+        )
+        .where(facet_name.in_(sa.bindparam("kw_all", expanding=True)))
+        .group_by(cads_catalogue.database.ResourceFacet.resource_id)
+        .having(
+            sa.and_(
+                *(
+                    sa.func.bool_or(
+                        facet_name.in_(sa.bindparam(f"kw_{index}", expanding=True))
+                    )
+                    for index in range(categories)
+                )
+            )
+        )
+    )
+
+
 def apply_filters(
     session: sa.orm.Session,
     search: sa.orm.Query,
@@ -170,30 +234,28 @@ def apply_filters(
     # Faceted search
     if kw:
         # Facetes search criteria is to run on OR in the same category, and AND between categories
-        # To make this working be perform subqueryes joint with the INTERSECT operator
         splitted_categories = split_by_category(kw)
-
-        subqueries = []
-        for categorized in splitted_categories:
-            # 1. Filter by all keywords in this category
-            query_kw = (
-                session.query(cads_catalogue.database.Facet.facet_id)
-                # We cannot just use in_ on all kws because we need to AND on different
-                .filter(cads_catalogue.database.Facet.facet_name.in_(categorized))
-            )
-            # 2. Manually build many to many relation
-            subquery_mtm = (
-                session.query(cads_catalogue.database.ResourceFacet.resource_id)
-                .filter(cads_catalogue.database.ResourceFacet.facet_id.in_(query_kw))
-                .scalar_subquery()
-            )
-            # 3. Perform partial query
-            subquery = session.query(cads_catalogue.database.Resource).filter(
-                cads_catalogue.database.Resource.resource_id.in_(subquery_mtm)
+        params = {
+            f"kw_{index}": categorized
+            for index, categorized in enumerate(splitted_categories)
+        }
+        strategy = config.settings.keywords_filter_strategy
+        if strategy == "grouped":
+            search = search.filter(
+                grouped_keywords_filter(len(splitted_categories))
+            ).params(kw_all=list(kw), **params)
+        elif strategy == "subqueries":
+            search = search.filter(keywords_filter(len(splitted_categories))).params(
+                params
             )
-            subqueries.append(subquery)
-        # 4. Join all subqueries with INTERSECT
-        search = search.intersect(*subqueries)
+        else:
+            # To make this working be perform subqueryes joint with the INTERSECT operator
+            entities = [column["expr"] for column in search.column_descriptions]
+            subqueries = [
+                session.query(*entities).filter(keywords_category_filter(index))
+                for index in range(len(splitted_categories))
+            ]
+            search = search.intersect(*subqueries).params(params)
 
     # FT search
     if q:
@@ -287,7 +349,8 @@ def apply_fts(search: sa.orm.Query, q: str, sortby: str | None = None):
     ):
         # perform an API call to config.settings.external_search_endpoint
         try:
-            ids = external_search(q.strip())
+            with timing.phase("external_search"):
+                ids = external_search(q.strip())
             if not ids:
                 return search.filter(sa.false())
 
@@ -308,6 +371,88 @@ def apply_fts(search: sa.orm.Query, q: str, sortby: str | None = None):
     return filtered_search
 
 
+def search_key(
+    q: str | None,
+    kw: list[str] | None,
+    idx: list[str] | None,
+    portals: list[str] | None,
+    sortby: str,
+) -> tuple:
+    """Normalize the search parameters determining the (ordered) matching datasets.
+
+    Keywords, ids and portals are filters: their order doesn't matter. Full text search
+    is case insensitive.
+    """
+    return (
+        " ".join(q.split()).lower() if q else None,
+        tuple(sorted(set(kw or []))),
+        tuple(sorted(set(idx or []))),
+        tuple(sorted(set(portals or []))),
+        sortby,
+    )
+
+
+class SearchCache:
+    """Bounded cache of search results (e.g. the ordered ids of the matching datasets).
+
+    Entries are keyed by catalogue version and `search_key`: a catalogue update makes
+    older entries unreachable. They also expire after ``ttl`` seconds, as results of the
+    external search service can change independently.
+    """
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self.enabled = maxsize > 0
+        self._cache: cachetools.TTLCache = cachetools.TTLCache(
+            maxsize=max(maxsize, 1), ttl=ttl
+        )
+        self._lock = threading.Lock()
+
+    def get(self, version: Any, key: tuple) -> Any:
+        if not self.enabled or version is None:
+            return None
+        with self._lock:
+            return self._cache.get((version, key))
+
+    def set(self, version: Any, key: tuple, value: Any) -> None:
+        if not self.enabled or version is None:
+            return
+        with self._lock:
+            self._cache[(version, key)] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def maxsize(self) -> int:
+        return self._cache.maxsize if self.enabled else 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    def items(self) -> list[tuple[Any, Any]]:
+        """Return a copy of the entries not expired yet."""
+        with self._lock:
+            self._cache.expire()
+            return list(self._cache.items())
+
+
+search_ids_cache = SearchCache(
+    maxsize=config.caches_settings.search_ids_cache_maxsize,
+    ttl=config.caches_settings.search_ids_cache_ttl,
+)
+facets_cache = SearchCache(
+    maxsize=config.caches_settings.facets_cache_maxsize,
+    ttl=config.caches_settings.search_ids_cache_ttl,
+)
+# serialized pages of datasets, keyed by (search_key, base url, page, limit)
+pages_cache = SearchCache(
+    maxsize=config.caches_settings.pages_cache_maxsize,
+    ttl=config.caches_settings.pages_cache_ttl,
+)
+
+
 class CollectionsWithStats(stac_fastapi.types.stac.Collections):
     """A collection with search stats."""
 
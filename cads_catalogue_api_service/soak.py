@@ -0,0 +1,207 @@
+"""Soak test: many mixed requests sent in-process, tracking memory to detect leaks.
+
+Usage:
+
+    python -m cads_catalogue_api_service.soak --requests 20000
+    python -m cads_catalogue_api_service.soak --traffic traffic.jsonl --requests 50000
+
+Requests are taken in turn from captured traffic (see `traffic`), or from a default mix
+of routes. RSS, memory traced by ``tracemalloc`` and the top allocators are sampled over
+time; the report ends with the sizes of the in-process caches. The exit status is 1 when
+memory keeps growing after the warm-up (see `leak_check`).
+"""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import asyncio
+import collections
+import gc
+import itertools
+import json
+import statistics
+import sys
+import tracemalloc
+from typing import Any
+
+import attrs
+import httpx
+
+from . import memory, replay
+
+DEFAULT_PATHS = [
+    "/datasets",
+    "/datasets?q=temperature",
+    "/datasets?q=era5&sortby=update",
+    "/datasets?sortby=title&page=1&limit=20",
+    "/collections",
+    "/vocabularies/keywords",
+    "/vocabularies/licences",
+    "/messages",
+    "/datasets/unknown-dataset",
+]
+
+
+@attrs.define
+class Sample:
+    requests: int
+    rss: int | None
+    traced: int
+    peak: int
+    top_allocators: list[dict[str, Any]]
+
+
+def default_lines() -> list[dict[str, Any]]:
+    lines = []
+    for path in DEFAULT_PATHS:
+        path, _, query = path.partition("?")
+        lines.append({"method": "GET", "path": path, "query": query})
+    return lines
+
+
+def top_allocators(
+    snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, limit: int
+) -> list[dict[str, Any]]:
+    """Return the source lines whose allocations grew the most since the baseline."""
+    return [
+        {
+            "location": str(statistic.traceback[0]),
+            "size": statistic.size,
+            "size_diff": statistic.size_diff,
+            "count_diff": statistic.count_diff,
+        }
+        for statistic in snapshot.compare_to(baseline, "lineno")[:limit]
+    ]
+
+
+def leak_check(
+    samples: list[Sample], warmup: float = 0.2, tolerance: float = 0.05
+) -> dict[str, Any]:
+    """Check if traced memory keeps growing after the first `warmup` fraction of samples.
+
+    Growth is estimated by a linear fit of traced memory over the number of requests: a
+    leak is reported when it exceeds `tolerance` times the memory traced at the end of
+    the warm-up. Caches filling up during the warm-up are not leaks.
+    """
+    measured = samples[int(len(samples) * warmup) :]
+    if len(measured) < 3:
+        return {"leak": False, "growth": None, "bytes_per_request": None}
+    slope, _ = statistics.linear_regression(
+        [sample.requests for sample in measured],
+        [sample.traced for sample in measured],
+    )
+    growth = slope * (measured[-1].requests - measured[0].requests)
+    return {
+        "leak": growth > tolerance * measured[0].traced,
+        "growth": int(growth),
+        "bytes_per_request": round(slope, 2),
+    }
+
+
+async def soak(
+    lines: list[dict[str, Any]],
+    client: httpx.AsyncClient,
+    requests: int = 10_000,
+    concurrency: int = 8,
+    sample_every: int = 500,
+    top: int = 10,
+) -> dict[str, Any]:
+    """Send `requests` requests cycling over `lines`, sampling memory between batches."""
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: collections.Counter[str] = collections.Counter()
+
+    async def send(line: dict[str, Any]) -> None:
+        url, headers = replay.request_url_headers(line)
+        async with semaphore:
+            try:
+                response = await client.request(line["method"], url, headers=headers)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    samples: list[Sample] = []
+    mix = itertools.cycle(lines)
+    sent = 0
+    try:
+        while sent < requests:
+            batch = [next(mix) for _ in range(min(sample_every, requests - sent))]
+            await asyncio.gather(*(send(line) for line in batch))
+            sent += len(batch)
+            gc.collect()
+            traced, peak = tracemalloc.get_traced_memory()
+            samples.append(
+                Sample(
+                    requests=sent,
+                    rss=memory.rss(),
+                    traced=traced,
+                    peak=peak,
+                    top_allocators=top_allocators(
+                        tracemalloc.take_snapshot(), baseline, top
+                    ),
+                )
+            )
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return {
+        "requests": sent,
+        "statuses": dict(statuses),
+        "samples": [attrs.asdict(sample) for sample in samples],
+        "leak_check": leak_check(samples),
+        "caches": memory.cache_sizes(deep=True),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    from .main import app
+
+    lines = replay.load_lines(args.traffic) if args.traffic else default_lines()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://soak", timeout=None
+    ) as client:
+        return await soak(
+            lines,
+            client,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            sample_every=args.sample_every,
+            top=args.top,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--traffic", help="file of captured request lines (default mix if not set)"
+    )
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--sample-every", type=int, default=500, help="requests between two samples"
+    )
+    parser.add_argument("--top", type=int, default=10, help="top allocators reported")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if report["leak_check"]["leak"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Log of slow SQL statements, and recording of the statements of debugged requests."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextvars
+import re
+from typing import Any
+
+import starlette.types
+import structlog
+
+from . import config
+
+logger = structlog.getLogger(__name__)
+
+# lists of bound parameters (e.g. expanded IN parameters)
+PARAMETERS_LIST_RE = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+WHITESPACE_RE = re.compile(r"\s+")
+
+# scope of the current request, to get its route template once routed
+current_scope: contextvars.ContextVar[starlette.types.Scope | None] = (
+    contextvars.ContextVar("sql_scope", default=None)
+)
+# statements of the current request, recorded when debugged (None otherwise)
+recorded: contextvars.ContextVar[list[dict[str, Any]] | None] = contextvars.ContextVar(
+    "sql_recorded", default=None
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """Return the statement with literals and lists of parameters collapsed.
+
+    Statements only differing by literal values or by the length of IN lists get the
+    same normalized SQL, so they can be aggregated.
+    """
+    statement = STRING_LITERAL_RE.sub("?", statement)
+    statement = NUMBER_LITERAL_RE.sub("?", statement)
+    statement = PARAMETERS_LIST_RE.sub("(...)", statement)
+    return WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def value_shape(value: Any) -> str:
+    """Return type (and length) of a bound value, not the value itself."""
+    if isinstance(value, (str, bytes, list, tuple, dict)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameters_shape(parameters: Any) -> Any:
+    """Return the shapes of bound parameters (of all the rows of executemany)."""
+    if isinstance(parameters, dict):
+        return {name: value_shape(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "first": parameters_shape(parameters[0])}
+        return [value_shape(value) for value in parameters]
+    return value_shape(parameters)
+
+
+def route() -> str | None:
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    return getattr(scope.get("route"), "path", None)
+
+
+def explain_analyze(connection: Any, statement: str, parameters: Any) -> str | None:
+    """Return the EXPLAIN ANALYZE output of a query, executing it again.
+
+    The query is run in a savepoint of the current transaction, on a new cursor of the
+    same DBAPI connection (results of the original cursor are kept, and no events are
+    triggered). Only SELECT statements are explained.
+    """
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = None
+    try:
+        cursor = connection.connection.cursor()
+        cursor.execute("SAVEPOINT explain_analyze")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_analyze")
+    except Exception as exc:
+        logger.warning("EXPLAIN ANALYZE failed", error=exc)
+        return None
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+def observe(connection: Any, statement: str, parameters: Any, seconds: float) -> None:
+    """Log the statement if slow, and record it if the request is debugged.
+
+    Called after the execution of each statement (see `metrics.instrument_engine`).
+    """
+    statements = recorded.get()
+    if statements is not None:
+        statements.append(
+            {
+                "sql": statement,
+                "parameters": parameters,
+                "seconds": seconds,
+                "plan": explain_analyze(connection, statement, parameters),
+            }
+        )
+
+    threshold = config.settings.slow_query_threshold
+    if threshold is None or seconds < threshold:
+        return
+    plan = None
+    if config.settings.slow_query_explain:
+        plan = explain_analyze(connection, statement, parameters)
+    # trace ID is bound to the logging context of the request
+    logger.warning(
+        "Slow SQL statement",
+        sql=normalize_sql(statement),
+        parameters=parameters_shape(parameters),
+        route=route(),
+        sql_time=seconds,
+        plan=plan,
+    )
@@ -1,8 +1,11 @@
+from typing import Any
+
 import cads_catalogue.database
 import fastapi
 import sqlalchemy
 from sqlalchemy.orm import Session
 
+from . import warmup
 from .dependencies import get_session
 from .models.status import CatalogueUpdateStatus
 
@@ -21,3 +24,11 @@ def get_catalogue_status(
     statement = sqlalchemy.select(cads_catalogue.database.CatalogueUpdate)
     results = session.execute(statement).scalars().all()
     return list(results)
+
+
+@router.get("/ready", include_in_schema=False)
+def get_readiness(response: fastapi.Response) -> dict[str, Any]:
+    """Report if the service is ready to accept traffic (i.e. warm-up completed)."""
+    if not warmup.state.ready:
+        response.status_code = fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": warmup.state.ready, "warmup_duration": warmup.state.duration}
@@ -0,0 +1,95 @@
+"""Breakdown of the latency of requests in phases, reported with the Server-Timing header."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import fastapi.responses
+
+SERVER_TIMING_HEADER_NAME = "Server-Timing"
+
+
+class Timings:
+    """Total duration (in seconds) of each phase of a request.
+
+    Phases running in other threads (e.g. concurrent facets) are added to the same
+    timings, as the context of the request is copied to them.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.statements = 0
+        # when the application started the response, before compression
+        self.response_start: float | None = None
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_statement(self, seconds: float) -> None:
+        """Account a SQL statement, executed in `seconds`."""
+        with self._lock:
+            self.statements += 1
+            self.phases["db"] = self.phases.get("db", 0.0) + seconds
+
+    def header(self) -> str:
+        """Return the value of the Server-Timing header (durations in milliseconds)."""
+        with self._lock:
+            return ", ".join(
+                f"{phase};dur={seconds * 1000:.1f}"
+                for phase, seconds in self.phases.items()
+            )
+
+
+# timings of the current request (None outside requests)
+current: contextvars.ContextVar[Timings | None] = contextvars.ContextVar(
+    "timings", default=None
+)
+
+
+def add(phase: str, seconds: float) -> None:
+    timings = current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+def add_statement(seconds: float) -> None:
+    timings = current.get()
+    if timings is not None:
+        timings.add_statement(seconds)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the duration of the block to the `name` phase of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - start)
+
+
+class TimedJSONResponse(fastapi.responses.JSONResponse):
+    """JSON response measuring the encoding of its content."""
+
+    def render(self, content: Any) -> bytes:
+        with phase("encode"):
+            return super().render(content)
@@ -0,0 +1,153 @@
+"""Capture of anonymized request lines, to be replayed by `replay`."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import queue
+import random
+import threading
+import time
+import urllib.parse
+from typing import Any
+
+import starlette.datastructures
+import starlette.types
+
+from . import config
+
+
+def normalize_query(query_string: bytes | str) -> str:
+    """Return the query string with parameters sorted (values of a parameter keep their order)."""
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode("latin-1")
+    params = urllib.parse.parse_qsl(query_string, keep_blank_values=True)
+    return urllib.parse.urlencode(sorted(params, key=lambda param: param[0]))
+
+
+class TrafficRecorder:
+    """Append request lines (JSON) to a file, from any thread.
+
+    Lines are queued and written by a background thread: writes never block the event
+    loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._queue: queue.Queue[dict[str, Any] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                line = self._queue.get()
+                try:
+                    if line is None:
+                        return
+                    file.write(json.dumps(line, separators=(",", ":")) + "\n")
+                    if self._queue.empty():
+                        file.flush()
+                finally:
+                    self._queue.task_done()
+
+    def write(self, line: dict[str, Any]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="traffic-recorder", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        """Wait until all the queued lines are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+
+# one recorder per file, shared by the middlewares writing to it
+recorders: dict[str, TrafficRecorder] = {}
+
+
+def get_recorder(path: str) -> TrafficRecorder:
+    if path not in recorders:
+        recorders[path] = TrafficRecorder(path)
+    return recorders[path]
+
+
+class TrafficCaptureMiddleware:
+    """Record a sample of requests to `Settings.traffic_capture_path` (disabled if None).
+
+    Lines are anonymized: only method, path, normalized query, portal and site headers are
+    kept from the request, along with route template, status, latency (in seconds) and
+    response size (in bytes, as sent).
+    This must be the outermost middleware, to measure the latency seen by clients.
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp):
+        self.app = app
+        path = config.settings.traffic_capture_path
+        self.recorder = get_recorder(path) if path else None
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ):
+        if (
+            scope["type"] != "http"
+            or self.recorder is None
+            or random.random() >= config.settings.traffic_capture_sample_rate
+        ):
+            return await self.app(scope, receive, send)
+
+        timestamp = time.time()
+        start = time.perf_counter()
+        response: dict[str, int] = {"status": 500, "size": 0}
+
+        async def send_measuring(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_measuring)
+        finally:
+            headers = starlette.datastructures.Headers(scope=scope)
+            route = scope.get("route")
+            self.recorder.write(
+                {
+                    "timestamp": round(timestamp, 3),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": normalize_query(scope.get("query_string", b"")),
+                    "route": getattr(route, "path", None),
+                    "portal": headers.get(config.PORTAL_HEADER_NAME),
+                    "site": headers.get(config.SITE_HEADER_NAME),
+                    "status": response["status"],
+                    "latency": round(time.perf_counter() - start, 6),
+                    "size": response["size"],
+                }
+            )
@@ -37,67 +37,83 @@ router = fastapi.APIRouter(
 )
 
 
-def query_licences(
-    session: sa.orm.Session,
+def licences_statement(
     scope: LicenceScopeCriterion,
     portals: list[str] | None = None,
-) -> list[cads_catalogue.database.Licence]:
-    """Query all licences.
+) -> sa.StatementLambdaElement:
+    """Return the statement selecting the latest revision of each used licence.
 
-    Return the latest revision of each licence. Older revision virtually disappear from API.
-    Dataset-scoped licences are only returned if used by at least one dataset.
+    Each combination of filters is built (and compiled) only once.
     """
-    # subquery, to select all unique licence_uids and their max revision
-    subquery = session.query(
-        cads_catalogue.database.Licence.licence_uid,
-        sa.func.max(cads_catalogue.database.Licence.revision).label("revision"),
-    ).group_by(cads_catalogue.database.Licence.licence_uid)
-
-    query = session.query(
-        cads_catalogue.database.Licence.licence_uid,
-        cads_catalogue.database.Licence.title,
-        cads_catalogue.database.Licence.md_filename,
-        cads_catalogue.database.Licence.download_filename,
-        cads_catalogue.database.Licence.revision,
-        cads_catalogue.database.Licence.scope,
-        cads_catalogue.database.Licence.portal,
-        cads_catalogue.database.Licence.spdx_identifier,
-    )
-
-    # Filters out unused dataset licences
-    query = query.outerjoin(
-        cads_catalogue.database.ResourceLicence,
-        cads_catalogue.database.Licence.licence_id
-        == cads_catalogue.database.ResourceLicence.licence_id,
-    ).filter(
-        sa.or_(
-            cads_catalogue.database.ResourceLicence.licence_id.isnot(None),
-            cads_catalogue.database.Licence.scope == "portal",
+    stmt = sa.lambda_stmt(
+        lambda: (
+            sa.select(
+                cads_catalogue.database.Licence.licence_uid,
+                cads_catalogue.database.Licence.title,
+                cads_catalogue.database.Licence.md_filename,
+                cads_catalogue.database.Licence.download_filename,
+                cads_catalogue.database.Licence.revision,
+                cads_catalogue.database.Licence.scope,
+                cads_catalogue.database.Licence.portal,
+                cads_catalogue.database.Licence.spdx_identifier,
+            )
+            # Filters out unused dataset licences
+            .outerjoin(
+                cads_catalogue.database.ResourceLicence,
+                cads_catalogue.database.Licence.licence_id
+                == cads_catalogue.database.ResourceLicence.licence_id,
+            )
+            .where(
+                sa.or_(
+                    cads_catalogue.database.ResourceLicence.licence_id.isnot(None),
+                    cads_catalogue.database.Licence.scope == "portal",
+                )
+            )
         )
     )
-
     if scope and scope != LicenceScopeCriterion.all:
-        query = query.filter(cads_catalogue.database.Licence.scope == scope)
+        scope_value = LicenceScopeCriterion(scope).value
+        stmt += lambda s: s.where(cads_catalogue.database.Licence.scope == scope_value)
     if portals:
-        query = query.filter(
+        stmt += lambda s: s.where(
             sa.or_(
                 cads_catalogue.database.Licence.portal.in_(portals),
                 cads_catalogue.database.Licence.portal.is_(None),
             )
         )
-
     # Now retrieve all licences where the tuple (licence_uid, revision) is in the subquery
-    results = (
-        query.filter(
+    # selecting all unique licence_uids and their max revision
+    stmt += lambda s: (
+        s.where(
             sa.tuple_(
                 cads_catalogue.database.Licence.licence_uid,
                 cads_catalogue.database.Licence.revision,
-            ).in_(subquery)
+            ).in_(
+                sa.select(
+                    cads_catalogue.database.Licence.licence_uid,
+                    sa.func.max(cads_catalogue.database.Licence.revision).label(
+                        "revision"
+                    ),
+                ).group_by(cads_catalogue.database.Licence.licence_uid)
+            )
         )
         .distinct()
         .order_by(cads_catalogue.database.Licence.title)
     )
-    return results  # type: ignore
+    return stmt
+
+
+def query_licences(
+    session: sa.orm.Session,
+    scope: LicenceScopeCriterion,
+    portals: list[str] | None = None,
+) -> list[cads_catalogue.database.Licence]:
+    """Query all licences.
+
+    Return the latest revision of each licence. Older revision virtually disappear from API.
+    Dataset-scoped licences are only returned if used by at least one dataset.
+    """
+    return session.execute(licences_statement(scope, portals)).all()  # type: ignore
 
 
 def query_licence(
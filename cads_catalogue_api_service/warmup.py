@@ -0,0 +1,122 @@
+"""Warm-up of connection pools and caches, run at startup before accepting traffic."""
+
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import time
+
+import anyio.to_thread
+import attrs
+import fastapi
+import httpx
+import structlog
+
+from . import config, dependencies, resolver
+from .fastapisessionmaker import FastAPISessionMaker
+from .replicas import ReplicaSessionMaker
+
+logger = structlog.getLogger(__name__)
+
+
+@attrs.define
+class WarmupState:
+    """Progress of the warm-up, as reported by the readiness endpoint."""
+
+    ready: bool = False
+    started_at: float | None = None
+    duration: float | None = None
+    errors: list[str] = attrs.field(factory=list)
+
+
+state = WarmupState()
+
+
+def session_makers() -> list[FastAPISessionMaker]:
+    """Return the session makers used to read the catalogue (fallback database excluded)."""
+    session_maker = dependencies.get_sessionmaker(read_only=True)
+    if isinstance(session_maker, ReplicaSessionMaker):
+        return [replica.session_maker for replica in session_maker.replicas]
+    return [session_maker]
+
+
+def open_connections(session_maker: FastAPISessionMaker, count: int) -> None:
+    """Open `count` connections at the same time, so they are kept in the pool."""
+    engine = session_maker.cached_engine
+    statistics = session_maker.pool_statistics()
+    if statistics is not None:
+        count = min(count, statistics["size"])
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_up_databases(connections: int) -> None:
+    for session_maker in session_makers():
+        try:
+            open_connections(session_maker, connections)
+        except Exception as exc:
+            # an unreachable replica must not prevent the others to be warmed up
+            logger.warning(
+                "Warm-up of database failed", database=session_maker.name, error=exc
+            )
+            state.errors.append(f"{session_maker.name}: {exc}")
+
+
+async def warm_up_routes(app: fastapi.FastAPI, paths: list[str]) -> None:
+    """Request the given paths in-process, running the hot queries and filling caches.
+
+    The first dataset returned by `/datasets` is also requested, if any.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://warmup"
+    ) as client:
+        for path in paths:
+            response = await client.get(path)
+            if response.status_code != 200:
+                state.errors.append(f"{path}: {response.status_code}")
+                continue
+            if path == "/datasets" and response.json().get("collections"):
+                collection_id = response.json()["collections"][0]["id"]
+                await client.get(f"/collections/{collection_id}")
+                await client.get(f"/collections/{collection_id}/schema.org")
+
+
+async def warm_up(app: fastapi.FastAPI) -> None:
+    """Warm up pools, compiled statements and in-process caches, then report readiness.
+
+    The service is reported as ready even if the warm-up fails or times out: errors are
+    logged, and the first requests just pay the price of cold caches.
+    """
+    state.started_at = time.monotonic()
+    try:
+        async with asyncio.timeout(config.settings.warmup_timeout):
+            await anyio.to_thread.run_sync(
+                warm_up_databases, config.settings.warmup_connections
+            )
+            await anyio.to_thread.run_sync(resolver.index.ensure_fresh)
+            await anyio.to_thread.run_sync(app.openapi)
+            await warm_up_routes(app, config.settings.warmup_paths)
+    except Exception as exc:
+        logger.error("Warm-up failed", error=exc)
+        state.errors.append(repr(exc))
+    finally:
+        state.duration = time.monotonic() - state.started_at
+        state.ready = True
+        logger.info("Warm-up completed", duration=state.duration, errors=state.errors)
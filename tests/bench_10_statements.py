@@ -0,0 +1,124 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmarks of the per-request cost of building the hot SQL statements.
+
+No database is needed: this measures what happens before SQLAlchemy finds the statement
+in its compiled cache (statement construction and cache key generation).
+
+Run with: python -m pytest tests/bench_10_statements.py --benchmark-group-by=group
+"""
+
+import cads_catalogue.database
+import pytest
+import sqlalchemy as sa
+
+from cads_catalogue_api_service import client, messages, search_utils
+
+KEYWORDS = [
+    "Variable domain: Atmosphere (surface)",
+    "Variable domain: Atmosphere (upper air)",
+    "Spatial coverage: Global",
+    "Temporal coverage: Past",
+]
+
+
+@pytest.fixture
+def session() -> sa.orm.Session:
+    # statements are only built, never executed
+    return sa.orm.Session()
+
+
+def prepare(statement) -> None:
+    statement._generate_cache_key()
+
+
+def legacy_active_message(session: sa.orm.Session) -> None:
+    query = (
+        session.query(cads_catalogue.database.Message)
+        .join(cads_catalogue.database.Message.resources)
+        .where(
+            cads_catalogue.database.Resource.resource_uid == "era5",
+            cads_catalogue.database.Message.live.is_(True),
+            cads_catalogue.database.Message.severity.in_(["warning", "critical"]),
+        )
+        .order_by(cads_catalogue.database.Message.date.desc())
+        .limit(1)
+    )
+    prepare(query.statement)
+
+
+def legacy_keywords(session: sa.orm.Session) -> None:
+    search = session.query(cads_catalogue.database.Resource)
+    subqueries = []
+    for categorized in search_utils.split_by_category(KEYWORDS):
+        query_kw = session.query(cads_catalogue.database.Facet.facet_id).filter(
+            cads_catalogue.database.Facet.facet_name.in_(categorized)
+        )
+        subquery_mtm = (
+            session.query(cads_catalogue.database.ResourceFacet.resource_id)
+            .filter(cads_catalogue.database.ResourceFacet.facet_id.in_(query_kw))
+            .scalar_subquery()
+        )
+        subqueries.append(
+            session.query(cads_catalogue.database.Resource).filter(
+                cads_catalogue.database.Resource.resource_id.in_(subquery_mtm)
+            )
+        )
+    prepare(search.intersect(*subqueries).statement)
+
+
+@pytest.mark.benchmark(group="active message")
+def test_active_message_legacy(benchmark, session) -> None:
+    benchmark(legacy_active_message, session)
+
+
+@pytest.mark.benchmark(group="active message")
+def test_active_message_lambda(benchmark) -> None:
+    benchmark(
+        lambda: prepare(
+            client.active_message_statement("era5", ["warning", "critical"])
+        )
+    )
+
+
+@pytest.mark.benchmark(group="messages")
+def test_messages_lambda(benchmark) -> None:
+    benchmark(
+        lambda: prepare(
+            messages.messages_statement(
+                live=True, is_global=False, collection_id="era5"
+            )
+        )
+    )
+
+
+@pytest.mark.benchmark(group="keywords filter")
+def test_keywords_legacy(benchmark, session) -> None:
+    benchmark(legacy_keywords, session)
+
+
+@pytest.mark.benchmark(group="keywords filter")
+def test_keywords_cached(benchmark, session) -> None:
+    def cached_keywords() -> None:
+        search = search_utils.apply_filters(
+            session,
+            session.query(cads_catalogue.database.Resource),
+            q=None,
+            kw=KEYWORDS,
+            idx=None,
+        )
+        prepare(search.statement)
+
+    benchmark(cached_keywords)
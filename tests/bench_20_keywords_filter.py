@@ -0,0 +1,89 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare the SQL shapes of the keywords filter on a synthetic 10k datasets catalogue.
+
+The INTERSECT of a query per category (the default) is the baseline of the others.
+
+Run with: python -m pytest -s tests/bench_20_keywords_filter.py --benchmark-group-by=param:kw
+(plans are printed with -s)
+"""
+
+import cads_catalogue.database
+import pytest
+import sqlalchemy as sa
+import synthetic
+
+from cads_catalogue_api_service import config, search_utils
+
+KEYWORDS = {
+    "1 category": ["Category 0: Keyword 1"],
+    "2 categories": ["Category 0: Keyword 1", "Category 1: Keyword 2"],
+    "4 categories": [
+        "Category 0: Keyword 1",
+        "Category 0: Keyword 2",
+        "Category 1: Keyword 2",
+        "Category 2: Keyword 3",
+        "Category 3: Keyword 4",
+        "Category 3: Keyword 5",
+    ],
+}
+
+
+@pytest.fixture()
+def session(session_obj) -> sa.orm.Session:
+    session = session_obj()
+    synthetic.generate_catalogue(session, datasets=10_000)
+    yield session
+    session.close()
+
+
+def search(session: sa.orm.Session, kw: list[str]) -> tuple[int, list[str]]:
+    """Run the count and first page queries, like /datasets does."""
+    query = search_utils.apply_filters(
+        session,
+        session.query(cads_catalogue.database.Resource.resource_uid),
+        q=None,
+        kw=kw,
+        idx=None,
+    )
+    page = query.order_by(cads_catalogue.database.Resource.resource_uid).limit(50)
+    return query.count(), [row.resource_uid for row in page]
+
+
+@pytest.mark.parametrize("kw", list(KEYWORDS))
+@pytest.mark.parametrize("strategy", ["intersect", "subqueries", "grouped"])
+def test_keywords_filter(benchmark, monkeypatch, session, strategy, kw) -> None:
+    monkeypatch.setattr(config.settings, "keywords_filter_strategy", strategy)
+
+    count, page = benchmark(search, session, KEYWORDS[kw])
+
+    # all the strategies must return the same results of the baseline
+    monkeypatch.setattr(config.settings, "keywords_filter_strategy", "intersect")
+    assert (count, page) == search(session, KEYWORDS[kw])
+    assert count > 0
+
+    monkeypatch.setattr(config.settings, "keywords_filter_strategy", strategy)
+    query = search_utils.apply_filters(
+        session,
+        session.query(cads_catalogue.database.Resource.resource_uid),
+        q=None,
+        kw=KEYWORDS[kw],
+        idx=None,
+    )
+    statement = query.statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = session.execute(sa.text(f"EXPLAIN ANALYZE {statement}")).scalars().all()
+    print(f"\n{strategy}, {kw}:\n" + "\n".join(plan))
@@ -0,0 +1,53 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency of the main routes on synthetic catalogues 1, 10 and 100 times the current one.
+
+Run with: python -m pytest tests/bench_30_scale.py --benchmark-group-by=param:path
+"""
+
+import fastapi.testclient
+import pytest
+import synthetic
+from testing import clear_caches
+
+from cads_catalogue_api_service.main import app
+
+client = fastapi.testclient.TestClient(app)
+
+PATHS = [
+    "/datasets?limit=50",
+    "/datasets?limit=50&kw=Category 0: Keyword 1",
+    "/datasets?limit=50&q=temperature",
+    "/collections/dataset-1",
+    "/messages",
+    "/vocabularies/licences",
+    "/contents",
+]
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize(
+    "catalogue_sessionmaker",
+    [synthetic.CURRENT_DATASETS * scale for scale in synthetic.SCALES],
+    ids=[f"{scale}x" for scale in synthetic.SCALES],
+    indirect=True,
+)
+@pytest.mark.benchmark(group="scale")
+def test_route_scale(benchmark, catalogue_sessionmaker, path: str) -> None:
+    def request() -> None:
+        clear_caches()
+        assert client.get(path).status_code == 200
+
+    benchmark(request)
@@ -0,0 +1,190 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-benchmarks of the serialization and search hot paths.
+
+No database is needed: inputs are transient ORM objects and plain data of increasing
+size. Save a baseline with `make benchmarks-baseline`, and compare a change against it
+with `make benchmarks-compare` (fails if slower than the baseline by more than 10%).
+"""
+
+import datetime
+import random
+
+import cads_catalogue.database
+import pytest
+import synthetic
+from testing import Request, get_record
+
+from cads_catalogue_api_service import client, contents, models, sanity_check
+from cads_catalogue_api_service.search_utils import populate_facets, split_by_category
+
+# number of keywords, related datasets, documentation entries... of a dataset
+SIZES = {"small": 2, "medium": 20, "large": 200}
+# number of datasets of the catalogue, for facets
+CATALOGUE_SIZES = {
+    f"{scale}x": synthetic.CURRENT_DATASETS * scale for scale in synthetic.SCALES
+}
+
+REQUEST = Request(base_url="https://mycatalogue.org/")
+
+
+class PrefetchedSession:
+    """Session with the active messages of datasets already loaded."""
+
+    def __init__(self, resource_uid: str) -> None:
+        message = cads_catalogue.database.Message(
+            message_uid="message-1",
+            date=datetime.datetime(2025, 1, 1),
+            content="Message 1",
+            severity="warning",
+            live=True,
+        )
+        self.info = {
+            "active_messages": {(resource_uid, ("warning", "critical")): message}
+        }
+
+
+def sized_record(size: int) -> cads_catalogue.database.Resource:
+    rng = random.Random(0)
+    record = get_record("era5-something")
+    record.facets = [
+        cads_catalogue.database.Facet(facet_name=keyword)
+        for keyword in synthetic.category_keywords(6, size)[:size]
+    ]
+    record.related_resources = [
+        cads_catalogue.database.Resource(
+            resource_uid=f"dataset-{related}", title=f"Dataset {related}"
+        )
+        for related in range(size)
+    ]
+    record.documentation = [
+        {
+            "url": f"https://rtd.org/documentation-{entry}",
+            "title": f"Documentation {entry}",
+            "description": synthetic.text(rng, 20),
+        }
+        for entry in range(size)
+    ]
+    record.sanity_check = synthetic.sanity_check_history(rng, min(size, 10))
+    return record
+
+
+def catalogue(datasets: int) -> list[dict]:
+    rng = random.Random(0)
+    keywords = synthetic.category_keywords(6, 12)
+    return [
+        {"id": f"dataset-{dataset}", "keywords": rng.sample(keywords, 12)}
+        for dataset in range(datasets)
+    ]
+
+
+@pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+@pytest.mark.parametrize("preview", [True, False], ids=["preview", "full"])
+@pytest.mark.benchmark(group="collection_serializer")
+def test_collection_serializer(benchmark, size: int, preview: bool) -> None:
+    record = sized_record(size)
+    session = PrefetchedSession(record.resource_uid)
+
+    benchmark(
+        client.collection_serializer,
+        record,
+        session=session,
+        request=REQUEST,
+        preview=preview,
+    )
+
+
+@pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+@pytest.mark.benchmark(group="generate_collection_links")
+def test_generate_collection_links(benchmark, size: int) -> None:
+    record = sized_record(size)
+
+    benchmark(client.generate_collection_links, model=record, request=REQUEST)
+
+
+@pytest.mark.parametrize("runs", [1, 3, 10])
+@pytest.mark.benchmark(group="sanity_check")
+def test_sanity_check(benchmark, runs: int) -> None:
+    history = synthetic.sanity_check_history(random.Random(0), runs)
+
+    benchmark(lambda: sanity_check.process(sanity_check.get_outputs(history)))
+
+
+@pytest.mark.parametrize(
+    "datasets", CATALOGUE_SIZES.values(), ids=CATALOGUE_SIZES.keys()
+)
+@pytest.mark.parametrize("keywords", [0, 1, 3])
+@pytest.mark.benchmark(group="populate_facets")
+def test_populate_facets(benchmark, datasets: int, keywords: int) -> None:
+    all_collections = catalogue(datasets)
+    kw = synthetic.category_keywords(keywords, 1)
+
+    benchmark(
+        populate_facets, all_collections=all_collections, collections={}, keywords=kw
+    )
+
+
+@pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+@pytest.mark.benchmark(group="split_by_category")
+def test_split_by_category(benchmark, size: int) -> None:
+    keywords = synthetic.category_keywords(6, size)
+
+    benchmark(split_by_category, keywords)
+
+
+@pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+@pytest.mark.benchmark(group="build_content")
+def test_build_content(benchmark, size: int) -> None:
+    content = cads_catalogue.database.Content(
+        content_id=1,
+        slug="how-to-api",
+        content_update=datetime.datetime(2022, 1, 1),
+        description=synthetic.text(random.Random(0), 50 * size),
+        image="relative/to/image.png",
+        link="http://apprepo.org/app-1",
+        layout="relative/to/layout.json",
+        publication_date=datetime.datetime(2022, 1, 1),
+        site="cds",
+        title="How to API?",
+        type="application",
+        resources=[
+            cads_catalogue.database.Resource(
+                resource_uid=f"dataset-{related}", title=f"Dataset {related}"
+            )
+            for related in range(size)
+        ],
+    )
+
+    benchmark(contents._build_content, content, request=REQUEST)
+
+
+@pytest.mark.parametrize("messages", [1, 100])
+@pytest.mark.benchmark(group="message_validation")
+def test_message_validation(benchmark, messages: int) -> None:
+    rng = random.Random(0)
+    rows = [
+        cads_catalogue.database.Message(
+            message_uid=f"message-{message}",
+            date=datetime.datetime(2025, 1, 1),
+            summary=synthetic.text(rng, 8),
+            content=synthetic.text(rng, 60),
+            severity="info",
+            live=True,
+            show_date=True,
+        )
+        for message in range(messages)
+    ]
+
+    benchmark(lambda: [models.Message.model_validate(row) for row in rows])
@@ -1,13 +1,18 @@
 import os
+from collections.abc import Iterator
 from typing import Any
 from unittest.mock import Mock
 
 import pytest
 import sqlalchemy as sa
+import synthetic
 from cads_catalogue import database
 from cads_catalogue.database import Resource
 from psycopg import Connection
 from sqlalchemy.orm import sessionmaker
+from testing import clear_caches
+
+from cads_catalogue_api_service import dependencies, fastapisessionmaker, main
 
 
 @pytest.fixture(autouse=True)
@@ -63,3 +68,37 @@ def session_obj(postgresql: Connection[str]) -> sessionmaker:
     database.create_catalogue_functions(engine)
     session_obj = sessionmaker(engine)
     return session_obj
+
+
+@pytest.fixture()
+def catalogue_sessionmaker(
+    request: pytest.FixtureRequest,
+    session_obj: sessionmaker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[fastapisessionmaker.FastAPISessionMaker]:
+    """Serve a synthetic catalogue from the test database, with cold caches.
+
+    The catalogue has 100 datasets, unless another number is given as parameter.
+    """
+    with session_obj() as session:
+        synthetic.generate_catalogue(session, datasets=getattr(request, "param", 100))
+    engine = session_obj.kw["bind"]
+    session_maker = fastapisessionmaker.FastAPISessionMaker(
+        engine.url.render_as_string(hide_password=False), read_only=True, name="test"
+    )
+    monkeypatch.setattr(
+        dependencies, "get_sessionmaker", lambda read_only=True: session_maker
+    )
+    # some test modules override the database session for the whole app
+    monkeypatch.setattr(main.app, "dependency_overrides", {})
+    clear_caches()
+    yield session_maker
+    session_maker.cached_engine.dispose()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--update-query-plans",
+        action="store_true",
+        help="write the snapshots of the query plans (see test_80_query_plans)",
+    )
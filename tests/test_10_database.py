@@ -0,0 +1,96 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any
+
+import cads_catalogue.database
+import pytest
+import sqlalchemy as sa
+from testing import Request, get_record
+
+import cads_catalogue_api_service.client
+from cads_catalogue_api_service import database
+
+RESOURCE_COLUMNS = set(sa.inspect(cads_catalogue.database.Resource).column_attrs.keys())
+
+
+class AttributeRecorder:
+    """Proxy a database record, keeping track of all the accessed attributes."""
+
+    def __init__(self, record: cads_catalogue.database.Resource) -> None:
+        self._record = record
+        self.accessed: set[str] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        self.accessed.add(name)
+        return getattr(self._record, name)
+
+
+def accessed_columns(recorder: AttributeRecorder) -> set[str]:
+    return recorder.accessed & RESOURCE_COLUMNS
+
+
+def projected_columns(profile: str) -> set[str]:
+    return {col.key for col in database.PROJECTIONS[profile]}
+
+
+@pytest.fixture
+def recorder(monkeypatch) -> AttributeRecorder:
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.client.get_active_message",
+        lambda *args, **kwargs: None,
+    )
+    return AttributeRecorder(get_record("era5-something"))
+
+
+def test_projections_are_columns() -> None:
+    for profile in database.PROJECTIONS:
+        assert projected_columns(profile) <= RESOURCE_COLUMNS
+        assert "resource_uid" in projected_columns(profile)
+        assert len(database.load_only(profile)) == 1
+
+
+@pytest.mark.parametrize(
+    ("profile", "serializer_kwargs"),
+    [
+        ("preview", {"preview": True}),
+        ("detail", {}),
+        ("schema_org", {"schema_org": True}),
+    ],
+)
+def test_serializer_projections(recorder, profile, serializer_kwargs) -> None:
+    """Projections must cover all the columns read by the serializer."""
+    cads_catalogue_api_service.client.collection_serializer(
+        recorder,
+        session=object(),
+        request=Request("https://mycatalogue.org/"),
+        **serializer_kwargs,
+    )
+
+    assert accessed_columns(recorder)
+    assert accessed_columns(recorder) <= projected_columns(profile)
+
+
+def test_form_redirect_projection(recorder) -> None:
+    cads_catalogue_api_service.client.generate_form_links(recorder)
+
+    assert accessed_columns(recorder) == {"form", "constraints"}
+    assert accessed_columns(recorder) <= projected_columns("form_redirect")
+
+
+def test_preview_projection_is_smaller() -> None:
+    """Wide text columns must never be loaded by lists."""
+    for column in ("fulltext", "description", "variables", "lineage"):
+        assert column not in projected_columns("preview")
+        assert column not in projected_columns("facets")
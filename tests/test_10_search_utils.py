@@ -13,14 +13,23 @@
 # limitations under the License.
 
 
+import cads_catalogue.database
 import fastapi
 import fastapi.testclient
 import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
+from cads_catalogue_api_service import config
 from cads_catalogue_api_service.main import app
 from cads_catalogue_api_service.search_utils import (
+    SearchCache,
+    apply_filters,
     external_search,
+    keywords_category_filter,
+    keywords_filter,
     populate_facets,
+    search_key,
     split_by_category,
 )
 
@@ -86,6 +95,93 @@ def test_split_by_category():
     ]
 
 
+def test_apply_filters_keywords():
+    session = sa.orm.Session()
+    search = apply_filters(
+        session,
+        session.query(cads_catalogue.database.Resource.resource_id),
+        q=None,
+        kw=["cat1: kw1", "cat2: kw1", "cat1: kw2"],
+        idx=None,
+    )
+
+    compiled = search.statement.compile(dialect=postgresql.dialect())
+
+    assert compiled.params["kw_0"] == ["cat1: kw1", "cat1: kw2"]
+    assert compiled.params["kw_1"] == ["cat2: kw1"]
+    assert str(compiled).count("INTERSECT") == 2
+    # the filter clause of a category is built once
+    assert keywords_category_filter(1) is keywords_category_filter(1)
+
+
+def test_apply_filters_keywords_subqueries(monkeypatch):
+    monkeypatch.setattr(config.settings, "keywords_filter_strategy", "subqueries")
+    session = sa.orm.Session()
+    search = apply_filters(
+        session,
+        session.query(cads_catalogue.database.Resource),
+        q=None,
+        kw=["cat1: kw1", "cat2: kw1", "cat1: kw2"],
+        idx=None,
+    )
+
+    compiled = search.statement.compile(dialect=postgresql.dialect())
+
+    assert compiled.params["kw_0"] == ["cat1: kw1", "cat1: kw2"]
+    assert compiled.params["kw_1"] == ["cat2: kw1"]
+    assert "INTERSECT" not in str(compiled)
+    # the filter clause only depends on the number of categories
+    assert keywords_filter(2) is keywords_filter(2)
+
+
+def test_search_key():
+    assert search_key(
+        " ERA5  Temperature", ["b: 1", "a: 1"], None, ["c3s"], "update"
+    ) == search_key("era5 temperature", ["a: 1", "b: 1"], [], ["c3s"], "update")
+    assert search_key(None, [], None, None, "update") != search_key(
+        None, [], None, None, "title"
+    )
+
+
+def test_search_ids_cache():
+    cache = SearchCache(maxsize=2, ttl=60)
+    key = search_key("era5", [], [], None, "update")
+
+    cache.set((1,), key, [3, 2, 1])
+
+    assert cache.get((1,), key) == [3, 2, 1]
+    # a new catalogue version doesn't use old entries
+    assert cache.get((2,), key) is None
+
+    # nothing is cached with unknown catalogue version
+    cache.set(None, key, [1])
+    assert cache.get(None, key) is None
+
+    cache = SearchCache(maxsize=0, ttl=60)
+    cache.set((1,), key, [1])
+    assert cache.get((1,), key) is None
+
+
+def test_apply_filters_keywords_grouped(monkeypatch):
+    monkeypatch.setattr(config.settings, "keywords_filter_strategy", "grouped")
+    session = sa.orm.Session()
+    search = apply_filters(
+        session,
+        session.query(cads_catalogue.database.Resource),
+        q=None,
+        kw=["cat1: kw1", "cat2: kw1", "cat1: kw2"],
+        idx=None,
+    )
+
+    compiled = search.statement.compile(dialect=postgresql.dialect())
+
+    assert compiled.params["kw_all"] == ["cat1: kw1", "cat2: kw1", "cat1: kw2"]
+    assert compiled.params["kw_0"] == ["cat1: kw1", "cat1: kw2"]
+    assert compiled.params["kw_1"] == ["cat2: kw1"]
+    assert "GROUP BY" in str(compiled)
+    assert str(compiled).count("bool_or") == 2
+
+
 @pytest.mark.parametrize(
     "distance, expected",
     [
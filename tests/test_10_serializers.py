@@ -208,3 +208,34 @@ def test_update_frequency(monkeypatch, update_frequency: str | None) -> None:
         record, session=object(), request=request
     )
     assert stac_record.get("cads:update_frequency") == update_frequency
+
+
+class PrefetchedSession:
+    def __init__(self, active_messages: dict) -> None:
+        self.info = {"active_messages": active_messages}
+
+    def scalars(self, *args, **kwargs):
+        raise AssertionError("prefetched messages must not be queried")
+
+
+def test_get_active_message_prefetched() -> None:
+    filter_types = ("warning", "critical")
+    session = PrefetchedSession(
+        {
+            ("era5-something", filter_types): cads_catalogue.database.Message(
+                message_uid="message-1",
+                date=datetime.datetime(2024, 1, 1, 12, 15, 34),
+                content="Message 1",
+                severity="warning",
+                live=True,
+            ),
+            ("era5-other", filter_types): None,
+        }
+    )
+
+    record = cads_catalogue.database.Resource(resource_uid="era5-something")
+    message = cads_catalogue_api_service.client.get_active_message(record, session)
+    assert message is not None and message.message_uid == "message-1"
+
+    record = cads_catalogue.database.Resource(resource_uid="era5-other")
+    assert cads_catalogue_api_service.client.get_active_message(record, session) is None
@@ -247,7 +247,7 @@ def test_query_licences(session_obj, scope, portals, expected) -> None:
         session.add(link)
         session.commit()
 
-        results = vocabularies.query_licences(session, scope, portals).all()
+        results = vocabularies.query_licences(session, scope, portals)
 
         returned_uids = {row.licence_uid for row in results}
         assert returned_uids == expected
@@ -0,0 +1,163 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import types
+from typing import Any
+
+import fastapi.testclient
+import pytest
+
+from cads_catalogue_api_service import client, search_utils
+from cads_catalogue_api_service.main import app
+
+test_client = fastapi.testclient.TestClient(app)
+
+FACETS = {"kw": [{"category": "cat1", "groups": {"kw1": 2, "kw2": 1}}]}
+
+
+def test_datasets_facets(monkeypatch) -> None:
+    calls = []
+
+    def datasets_facets(self, request, q, kw):
+        calls.append((q, kw))
+        return FACETS
+
+    monkeypatch.setattr(client.CatalogueClient, "datasets_facets", datasets_facets)
+
+    response = test_client.get(
+        "/datasets/facets", params={"q": "era5", "kw": "cat1: kw1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == FACETS
+    assert calls == [("era5", ["cat1: kw1"])]
+    etag = response.headers["etag"]
+
+    response = test_client.get(
+        "/datasets/facets",
+        params={"q": "era5", "kw": "cat1: kw1"},
+        headers={"If-None-Match": etag},
+    )
+
+    assert response.status_code == 304
+
+    response = test_client.post("/datasets/facets", json={"kw": ["cat1: kw1"]})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+    assert calls[-1] == ("", ["cat1: kw1"])
+
+
+def test_search_facets_cache(monkeypatch) -> None:
+    loads = []
+
+    def load_catalogue(self, session, request, q, portals):
+        loads.append(q)
+        return [
+            {"id": "dataset1", "keywords": ["cat1: kw1"]},
+            {"id": "dataset2", "keywords": ["cat1: kw1", "cat1: kw2"]},
+        ]
+
+    monkeypatch.setattr(client.CatalogueClient, "load_catalogue", load_catalogue)
+    monkeypatch.setattr(
+        search_utils, "facets_cache", search_utils.SearchCache(maxsize=8, ttl=60)
+    )
+    monkeypatch.setattr(client.resolver.index, "ensure_fresh", lambda: None)
+    monkeypatch.setattr(client.resolver.index, "version", (1,))
+
+    facets = client.cads_client.search_facets(None, None, "ERA5", [], None)
+
+    assert facets == {"kw": [{"category": "cat1", "groups": {"kw1": 2, "kw2": 1}}]}
+
+    # same (normalized) search: facets are cached
+    client.cads_client.search_facets(None, None, " era5", [], None)
+    assert loads == ["ERA5"]
+
+    # a new catalogue version requires new facets
+    monkeypatch.setattr(client.resolver.index, "version", (2,))
+    client.cads_client.search_facets(None, None, "era5", [], None)
+    assert loads == ["ERA5", "era5"]
+
+
+class FakeReader:
+    @contextlib.contextmanager
+    def context_session(self) -> Any:
+        yield None
+
+
+class MockRequest:
+    headers: dict[str, str] = {}
+    query_params: dict[str, str] = {}
+    base_url = "http://localhost/"
+
+    def __init__(self) -> None:
+        self.state = types.SimpleNamespace()
+
+    def url_for(self, name: str) -> str:
+        return {
+            "Datasets Search": "http://localhost/datasets",
+            "Datasets Facets": "http://localhost/datasets/facets",
+        }[name]
+
+
+@pytest.mark.parametrize(
+    "search_stats, facets, expected",
+    [
+        (True, FACETS, False),
+        (False, FACETS, True),
+        # facets not computed in time: the search is degraded
+        (True, None, True),
+    ],
+)
+def test_datasets_facets_link(monkeypatch, search_stats, facets, expected) -> None:
+    monkeypatch.setattr(
+        client.CatalogueClient, "reader", property(lambda self: FakeReader())
+    )
+    monkeypatch.setattr(
+        client.CatalogueClient, "search_ids", lambda self, session, **kwargs: [1]
+    )
+    monkeypatch.setattr(
+        client.CatalogueClient, "load_datasets", lambda self, session, ids: ids
+    )
+    monkeypatch.setattr(
+        client.CatalogueClient,
+        "serialize_datasets",
+        lambda self, session, request, collections: [{"id": "dataset-1"}],
+    )
+    monkeypatch.setattr(
+        client.CatalogueClient,
+        "search_facets",
+        lambda self, session, request, q, kw, portals, deadline: facets,
+    )
+    monkeypatch.setattr(client, "search_executor", None)
+    monkeypatch.setattr(
+        search_utils, "pages_cache", search_utils.SearchCache(maxsize=8, ttl=60)
+    )
+
+    collections = client.cads_client.all_datasets(
+        MockRequest(),
+        q="era5",
+        kw=["cat1: kw1"],
+        route_name="Datasets Search",
+        search_stats=search_stats,
+    )
+
+    links = [link for link in collections["links"] if link["rel"] == "facets"]
+    assert bool(links) is expected
+    assert ("search" in collections) is not expected
+    if expected:
+        assert links[0]["href"] == (
+            "http://localhost/datasets/facets?q=era5&kw=cat1%3A+kw1"
+        )
@@ -0,0 +1,209 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+
+import fastapi.testclient
+import prometheus_client
+import pytest
+
+from cads_catalogue_api_service import config, resolver
+from cads_catalogue_api_service.main import app
+
+client = fastapi.testclient.TestClient(app)
+
+ROWS = [
+    resolver.ResolverEntry(
+        resource_uid="era5-something",
+        doi="11.2222/cads.12345",
+        form="resources/era5-something/form.json",
+        constraints="resources/era5-something/constraints.json",
+        portal="c3s",
+    ),
+    resolver.ResolverEntry(resource_uid="no-form", doi="11.2222/cads.1", portal="c3s"),
+    resolver.ResolverEntry(resource_uid="dup-1", doi="11.2222/cads.dup"),
+    resolver.ResolverEntry(resource_uid="dup-2", doi="11.2222/cads.dup"),
+]
+
+
+class FakeSessionMaker:
+    def __init__(self) -> None:
+        self.opened = 0
+
+    @contextlib.contextmanager
+    def context_session(self):
+        self.opened += 1
+        yield object()
+
+
+@pytest.fixture
+def fake_db(monkeypatch) -> dict:
+    db = {"version": (1,), "rows": ROWS, "sessionmaker": FakeSessionMaker()}
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.resolver.database.query_catalogue_version",
+        lambda session: db["version"],
+    )
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.resolver.query_entries",
+        lambda session: db["rows"],
+    )
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.resolver.dependencies.get_sessionmaker",
+        lambda read_only: db["sessionmaker"],
+    )
+    return db
+
+
+@pytest.fixture
+def index(monkeypatch, fake_db) -> resolver.ResolverIndex:
+    index = resolver.ResolverIndex(check_interval=60)
+    monkeypatch.setattr("cads_catalogue_api_service.resolver.index", index)
+    return index
+
+
+def test_resolver_index(index, fake_db) -> None:
+    assert index.get("era5-something").form == "resources/era5-something/form.json"
+    assert index.get_by_doi("11.2222/cads.1").resource_uid == "no-form"
+    assert index.get("not-existing") is None
+    # ambiguous DOIs are not resolved
+    assert index.get_by_doi("11.2222/cads.dup") is None
+    # catalogue version is checked once per interval
+    assert fake_db["sessionmaker"].opened == 1
+
+    fake_db["version"] = (2,)
+    fake_db["rows"] = ROWS[1:]
+    assert index.get("era5-something") is not None
+
+    index.invalidate()
+    assert index.get("era5-something") is None
+    assert index.version == (2,)
+
+
+def test_resolver_index_error(index, monkeypatch) -> None:
+    def failing_version(session):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.resolver.database.query_catalogue_version",
+        failing_version,
+    )
+
+    assert index.get("era5-something") is None
+    assert index.loaded is False
+
+
+def test_redirects_from_index(index) -> None:
+    response = client.get("/doi/11.2222/cads.12345", follow_redirects=False)
+
+    assert response.status_code == 301
+    assert response.headers["location"] == "/datasets/era5-something"
+
+    response = client.get(
+        "/collections/era5-something/form.json", follow_redirects=False
+    )
+
+    assert response.status_code == 307
+    assert response.headers["location"].endswith(
+        "/document-storage/resources/era5-something/form.json"
+    )
+
+    response = client.get("/collections/no-form/constraints.json")
+
+    assert response.status_code == 404
+
+
+def negative_lookups(route: str) -> float:
+    return (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_negative_lookups_total", {"route": route}
+        )
+        or 0
+    )
+
+
+def unexpected_query(*args, **kwargs):
+    raise AssertionError("database should not be queried")
+
+
+def test_negative_lookups(index, monkeypatch) -> None:
+    for module in ("doi", "schema_org", "collection_ext"):
+        monkeypatch.setattr(
+            f"cads_catalogue_api_service.{module}.query_collection", unexpected_query
+        )
+    monkeypatch.setattr("cads_catalogue_api_service.client.lookup_id", unexpected_query)
+
+    before = negative_lookups("doi")
+    response = client.get("/doi/11.2222/not-existing")
+    assert response.status_code == 404
+    assert negative_lookups("doi") == before + 1
+
+    response = client.get("/collections/not-existing/schema.org")
+    assert response.status_code == 404
+
+    response = client.get("/collections/not-existing/form.json")
+    assert response.status_code == 404
+
+    before = negative_lookups("collection")
+    response = client.get("/collections/not-existing")
+    assert response.status_code == 404
+    # dataset exists, but not in the requested portal
+    response = client.get(
+        "/collections/era5-something", headers={config.PORTAL_HEADER_NAME: "foo"}
+    )
+    assert response.status_code == 404
+    assert negative_lookups("collection") == before + 2
+
+
+def test_negative_lookups_disabled(index, monkeypatch) -> None:
+    monkeypatch.setattr(config.caches_settings, "negative_lookup_enabled", False)
+
+    assert index.is_unknown("not-existing") is False
+    assert index.is_unknown_doi("11.2222/not-existing") is False
+
+    monkeypatch.setattr(config.caches_settings, "negative_lookup_enabled", True)
+
+    assert index.is_unknown("not-existing") is True
+    assert index.is_unknown("era5-something", portals=["c3s"]) is False
+    # ambiguous DOIs are known
+    assert index.is_unknown_doi("11.2222/cads.dup") is False
+
+
+def test_negative_lookups_after_publication(index, fake_db) -> None:
+    index.recheck_interval = 60
+
+    for _ in range(3):
+        assert index.is_unknown("new-dataset") is True
+        assert index.is_unknown_doi("11.2222/cads.new") is True
+    # misses are confirmed by the recent version check of the index load
+    assert fake_db["sessionmaker"].opened == 1
+
+    # published after the index was built, before the next periodic check
+    fake_db["version"] = (2,)
+    fake_db["rows"] = ROWS + [
+        resolver.ResolverEntry(
+            resource_uid="new-dataset", doi="11.2222/cads.new", portal="c3s"
+        )
+    ]
+    # staleness is bounded by the recheck interval
+    assert index.is_unknown("new-dataset") is True
+
+    index.recheck_interval = 0
+
+    assert index.is_unknown("new-dataset") is False
+    assert index.is_unknown_doi("11.2222/cads.new") is False
+    assert index.version == (2,)
+    # known datasets don't need a version check
+    opened = fake_db["sessionmaker"].opened
+    assert index.is_unknown("era5-something") is False
+    assert fake_db["sessionmaker"].opened == opened
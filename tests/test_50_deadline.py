@@ -0,0 +1,83 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fastapi
+import fastapi.testclient
+
+from cads_catalogue_api_service import client, deadline, middlewares, search_utils
+
+
+def test_deadline() -> None:
+    request_deadline = deadline.Deadline(budget=2, start=0)
+
+    assert request_deadline.remaining() < 0
+    assert not request_deadline.allows(0.1)
+
+    request_deadline = deadline.Deadline(budget=None)
+
+    assert not request_deadline.enabled
+    assert request_deadline.allows(3600)
+
+
+def test_duration_estimate() -> None:
+    estimate = deadline.DurationEstimate(weight=0.5)
+
+    estimate.observe(2)
+    assert estimate.value == 2
+
+    estimate.observe(4)
+    assert estimate.value == 3
+
+
+def test_deadline_middleware() -> None:
+    app = fastapi.FastAPI()
+    app.add_middleware(middlewares.DeadlineMiddleware)
+
+    @app.get("/degraded")
+    def degraded(request: fastapi.Request) -> dict:
+        deadline.get_deadline(request).degrade("facets")
+        return {}
+
+    @app.get("/complete")
+    def complete() -> dict:
+        return {}
+
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/degraded")
+
+    assert response.headers[deadline.PARTIAL_RESPONSE_HEADER_NAME] == "facets"
+    assert response.headers["cache-control"] == "no-store"
+
+    response = test_client.get("/complete")
+
+    assert deadline.PARTIAL_RESPONSE_HEADER_NAME not in response.headers
+
+
+def test_facets_skipped(monkeypatch) -> None:
+    def load_catalogue(self, session, request, q, portals):
+        raise AssertionError("facets should not be computed")
+
+    monkeypatch.setattr(client.CatalogueClient, "load_catalogue", load_catalogue)
+    monkeypatch.setattr(
+        search_utils, "facets_cache", search_utils.SearchCache(maxsize=8, ttl=60)
+    )
+    monkeypatch.setattr(client.resolver.index, "ensure_fresh", lambda: None)
+    monkeypatch.setattr(client.facets_duration, "value", 10.0)
+
+    facets = client.cads_client.search_facets(
+        None, None, "era5", [], None, deadline=deadline.Deadline(budget=1)
+    )
+
+    assert facets is None
@@ -0,0 +1,91 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import fastapi
+import httpx
+
+from cads_catalogue_api_service import memory, search_utils, soak
+
+
+def test_deep_sizeof() -> None:
+    small = {"ids": ["dataset-1"]}
+    large = {"ids": [f"dataset-{index}" for index in range(1000)]}
+
+    assert memory.deep_sizeof(small) > memory.deep_sizeof({})
+    assert memory.deep_sizeof(large) > 1000 * memory.deep_sizeof("dataset-1") / 2
+    # shared objects are accounted once
+    assert memory.deep_sizeof([large, large]) < 2 * memory.deep_sizeof(large)
+
+
+def test_cache_sizes(monkeypatch) -> None:
+    cache = search_utils.SearchCache(maxsize=8, ttl=60)
+    monkeypatch.setattr(search_utils, "search_ids_cache", cache)
+    cache.set("version", ("era5",), ["dataset-1", "dataset-2"])
+
+    sizes = memory.cache_sizes(deep=True)
+
+    assert sizes["search_ids"]["entries"] == 1
+    assert sizes["search_ids"]["maxsize"] == 8
+    assert sizes["search_ids"]["bytes"] > 0
+    assert "bytes" not in sizes["get_sessionmaker"]
+    assert {"external_search", "facets", "pages", "resolver_index"} <= set(sizes)
+
+
+def sample(requests: int, traced: int) -> soak.Sample:
+    return soak.Sample(
+        requests=requests, rss=None, traced=traced, peak=traced, top_allocators=[]
+    )
+
+
+def test_leak_check() -> None:
+    # memory grows during the warm-up only
+    samples = [sample(100, 1_000_000)] + [
+        sample(requests, 2_000_000) for requests in range(200, 1100, 100)
+    ]
+
+    assert not soak.leak_check(samples)["leak"]
+
+    samples = [
+        sample(requests, 1_000_000 + requests * 1000)
+        for requests in range(100, 1100, 100)
+    ]
+
+    assert soak.leak_check(samples)["leak"]
+
+
+def test_soak() -> None:
+    app = fastapi.FastAPI()
+    leaked = []
+
+    @app.get("/datasets")
+    def datasets() -> dict:
+        leaked.append(bytearray(10_000))
+        return {}
+
+    async def run() -> dict:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://soak"
+        ) as client:
+            return await soak.soak(
+                soak.default_lines()[:1], client, requests=200, sample_every=20
+            )
+
+    report = asyncio.run(run())
+
+    assert report["statuses"] == {"200": 200}
+    assert len(report["samples"]) == 10
+    assert report["leak_check"]["leak"]
+    assert "search_ids" in report["caches"]
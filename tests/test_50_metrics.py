@@ -0,0 +1,71 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import prometheus_client
+import pytest
+import sqlalchemy as sa
+
+from cads_catalogue_api_service import fastapisessionmaker, metrics
+
+
+def test_pool_metrics(tmp_path) -> None:
+    session_maker = fastapisessionmaker.FastAPISessionMaker(
+        f"sqlite:///{tmp_path}/test.db", name="test-pool"
+    )
+    metrics.POOL_COLLECTOR.register(session_maker)
+
+    assert session_maker.pool_statistics() is None
+
+    with session_maker.context_session() as session:
+        session.execute(sa.text("SELECT 1"))
+        assert session_maker.pool_statistics()["checked_out"] == 1
+        assert (
+            prometheus_client.REGISTRY.get_sample_value(
+                "catalogue_db_pool_checked_out", {"database": "test-pool"}
+            )
+            == 1
+        )
+
+    assert session_maker.pool_statistics()["checked_out"] == 0
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_db_pool_checkout_seconds_count", {"database": "test-pool"}
+        )
+        == 1
+    )
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_db_statement_seconds_count", {"database": "test-pool"}
+        )
+        == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_threadpool_metrics() -> None:
+    limiter = metrics.configure_threadpool()
+    total_tokens = limiter.total_tokens
+    try:
+        metrics.configure_threadpool(size=7)
+
+        assert (
+            prometheus_client.REGISTRY.get_sample_value("catalogue_threadpool_size")
+            == 7
+        )
+        assert (
+            prometheus_client.REGISTRY.get_sample_value("catalogue_threadpool_busy")
+            == 0
+        )
+    finally:
+        limiter.total_tokens = total_tokens
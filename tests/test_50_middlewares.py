@@ -12,9 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fastapi
+import fastapi.testclient
+import prometheus_client
 import pytest
+import structlog.testing
 
-from cads_catalogue_api_service import config, middlewares
+import cads_catalogue_api_service.main
+from cads_catalogue_api_service import (
+    config,
+    dependencies,
+    middlewares,
+    sqllog,
+    timing,
+)
 
 
 class MockRequest:
@@ -77,3 +88,173 @@ async def test_cache_middleware():
 
     assert "max-age" not in response.headers.get("cache-control", "")
     assert response.headers.get("cache-control") == "no-cache,no-store"
+
+
+def test_server_timing_middleware(monkeypatch) -> None:
+    app = fastapi.FastAPI()
+    app.add_middleware(middlewares.ResponseStartMiddleware)
+    app.add_middleware(middlewares.ServerTimingMiddleware)
+
+    @app.get("/timed")
+    def timed() -> dict:
+        with timing.phase("db"):
+            pass
+        return {}
+
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/timed")
+
+    assert timing.SERVER_TIMING_HEADER_NAME not in response.headers
+
+    response = test_client.get(
+        "/timed", headers={config.settings.server_timing_debug_header: "1"}
+    )
+
+    phases = [
+        value.split(";")[0]
+        for value in response.headers[timing.SERVER_TIMING_HEADER_NAME].split(", ")
+    ]
+    assert phases == ["db", "compress", "total"]
+
+    monkeypatch.setattr(config.settings, "server_timing_sample_rate", 1.0)
+    response = test_client.get("/timed")
+
+    assert timing.SERVER_TIMING_HEADER_NAME in response.headers
+
+
+def server_timing_phases(response) -> list[str]:
+    return [
+        value.split(";")[0]
+        for value in response.headers[timing.SERVER_TIMING_HEADER_NAME].split(", ")
+    ]
+
+
+def test_server_timing_compression() -> None:
+    test_client = fastapi.testclient.TestClient(cads_catalogue_api_service.main.app)
+
+    response = test_client.get(
+        "/openapi.json",
+        headers={
+            config.settings.server_timing_debug_header: "1",
+            "Accept-Encoding": "br",
+        },
+    )
+
+    assert response.headers["content-encoding"] == "br"
+    assert "compress" in server_timing_phases(response)
+
+
+def test_sql_accounting_middleware() -> None:
+    app = fastapi.FastAPI()
+    app.add_middleware(middlewares.SQLAccountingMiddleware)
+
+    @app.get("/sql/{name}")
+    def sql(name: str) -> dict:
+        timing.add_statement(0.01)
+        timing.add_statement(0.02)
+        return {}
+
+    test_client = fastapi.testclient.TestClient(app)
+
+    test_client.get("/sql/one")
+
+    labels = {"route": "/sql/{name}"}
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_request_sql_statements_sum", labels
+        )
+        == 2
+    )
+    assert prometheus_client.REGISTRY.get_sample_value(
+        "catalogue_request_sql_seconds_sum", labels
+    ) == pytest.approx(0.03)
+
+
+def test_sql_debug_middleware(monkeypatch) -> None:
+    monkeypatch.setattr(config.settings, "sql_debug_token", "secret")
+    app = fastapi.FastAPI()
+    app.add_middleware(middlewares.SQLDebugMiddleware)
+
+    @app.get("/sql")
+    def sql() -> dict:
+        sqllog.observe(None, "UPDATE resources SET popularity = 1", {}, 0.01)
+        return {"result": True}
+
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/sql", headers={"X-Debug-SQL": "secret"})
+
+    assert response.headers["cache-control"] == "no-store"
+    assert response.json()["status"] == 200
+    assert response.json()["sql_statements"] == 1
+    assert response.json()["statements"][0]["sql"].startswith("UPDATE")
+
+    response = test_client.get("/sql", headers={"X-Debug-SQL": "wrong"})
+
+    assert response.json() == {"result": True}
+
+
+class StatusSession:
+    def execute(self, statement):
+        # as recorded by the engine events (see metrics.instrument_engine)
+        timing.add_statement(0.01)
+        sqllog.observe(None, "SELECT * FROM catalogue_updates", {}, 0.01)
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self) -> list:
+        return []
+
+
+def test_sql_accounting_through_app(monkeypatch) -> None:
+    app = cads_catalogue_api_service.main.app
+    monkeypatch.setattr(
+        app,
+        "dependency_overrides",
+        {dependencies.get_session: lambda: StatusSession()},
+    )
+    test_client = fastapi.testclient.TestClient(app)
+    labels = {"route": "/status"}
+    before = (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_request_sql_statements_sum", labels
+        )
+        or 0
+    )
+
+    with structlog.testing.capture_logs() as logs:
+        response = test_client.get(
+            "/status", headers={config.settings.server_timing_debug_header: "1"}
+        )
+
+    assert response.status_code == 200
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "catalogue_request_sql_statements_sum", labels
+        )
+        == before + 1
+    )
+    (log,) = [log for log in logs if log["event"] == "Request SQL statements"]
+    assert log["sql_statements"] == 1
+    assert "db" in server_timing_phases(response)
+
+
+def test_sql_debug_through_app(monkeypatch) -> None:
+    monkeypatch.setattr(config.settings, "sql_debug_token", "secret")
+    app = cads_catalogue_api_service.main.app
+    monkeypatch.setattr(
+        app,
+        "dependency_overrides",
+        {dependencies.get_session: lambda: StatusSession()},
+    )
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/status", headers={"X-Debug-SQL": "secret"})
+
+    assert response.json()["route"] == "/status"
+    assert response.json()["sql_statements"] == 1
+    assert response.json()["statements"][0]["plan"] is None
+    assert "db" in response.json()["phases"]
@@ -0,0 +1,134 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import threading
+import types
+from typing import Any
+
+import pytest
+import sqlalchemy as sa
+
+from cads_catalogue_api_service import client, deadline, search_utils
+
+
+class FakeReader:
+    @contextlib.contextmanager
+    def context_session(self) -> Any:
+        yield None
+
+
+class SyncExecutor:
+    def submit(self, fn, *args) -> None:
+        fn(*args)
+
+
+@pytest.fixture
+def prefetch(monkeypatch) -> list[list[int]]:
+    loaded: list[list[int]] = []
+
+    def load_datasets(self, session, ids):
+        loaded.append(ids)
+        return ids
+
+    def serialize_datasets(self, session, request, collections):
+        return [{"id": f"dataset-{id}"} for id in collections]
+
+    monkeypatch.setattr(
+        client.CatalogueClient, "reader", property(lambda self: FakeReader())
+    )
+    monkeypatch.setattr(client.CatalogueClient, "load_datasets", load_datasets)
+    monkeypatch.setattr(
+        client.CatalogueClient, "serialize_datasets", serialize_datasets
+    )
+    monkeypatch.setattr(client, "prefetch_executor", SyncExecutor())
+    monkeypatch.setattr(client, "prefetch_budget", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(client, "service_saturated", lambda: False)
+    monkeypatch.setattr(
+        search_utils, "pages_cache", search_utils.SearchCache(maxsize=8, ttl=60)
+    )
+    return loaded
+
+
+def test_submit_prefetch(prefetch) -> None:
+    page_key = (("era5",), "http://localhost/", 1, 2)
+
+    client.cads_client.submit_prefetch(
+        None, (1,), page_key, [3, 4], deadline.Deadline(None)
+    )
+
+    assert prefetch == [[3, 4]]
+    assert search_utils.pages_cache.get((1,), page_key) == [
+        {"id": "dataset-3"},
+        {"id": "dataset-4"},
+    ]
+
+    # already prefetched
+    client.cads_client.submit_prefetch(
+        None, (1,), page_key, [3, 4], deadline.Deadline(None)
+    )
+
+    assert prefetch == [[3, 4]]
+
+
+def test_submit_prefetch_skipped(prefetch, monkeypatch) -> None:
+    page_key = (("era5",), "http://localhost/", 1, 2)
+    request_deadline = deadline.Deadline(None)
+    request_deadline.degrade("facets")
+
+    client.cads_client.submit_prefetch(None, (1,), page_key, [3, 4], request_deadline)
+
+    monkeypatch.setattr(client, "service_saturated", lambda: True)
+    client.cads_client.submit_prefetch(
+        None, (1,), page_key, [3, 4], deadline.Deadline(None)
+    )
+
+    monkeypatch.setattr(client, "service_saturated", lambda: False)
+    client.prefetch_budget.acquire()
+    client.cads_client.submit_prefetch(
+        None, (1,), page_key, [3, 4], deadline.Deadline(None)
+    )
+
+    assert prefetch == []
+
+
+class MockRequest:
+    headers: dict[str, str] = {}
+    query_params: dict[str, str] = {}
+    base_url = "http://localhost/"
+
+    def __init__(self) -> None:
+        self.state = types.SimpleNamespace()
+
+    def url_for(self, name: str) -> str:
+        return "http://localhost/collections"
+
+
+def test_all_datasets_retry_on_disconnect(prefetch, monkeypatch) -> None:
+    calls = []
+
+    def search_ids(self, session, **kwargs):
+        calls.append(session)
+        if len(calls) == 1:
+            raise sa.exc.OperationalError(
+                "SELECT 1", {}, Exception("gone"), connection_invalidated=True
+            )
+        return []
+
+    monkeypatch.setattr(client.CatalogueClient, "search_ids", search_ids)
+
+    collections = client.cads_client.all_datasets(MockRequest())
+
+    assert len(calls) == 2
+    assert collections["numberMatched"] == 0
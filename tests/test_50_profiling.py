@@ -0,0 +1,115 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import fastapi
+import fastapi.testclient
+from brotli_asgi import BrotliMiddleware  # type: ignore
+from testing import middleware_classes
+
+import cads_catalogue_api_service.main
+from cads_catalogue_api_service import config, middlewares, profiling
+
+
+def busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_sampler() -> None:
+    sampler = profiling.Sampler(interval=0.001)
+    thread = threading.Thread(target=busy, args=(0.1,))
+
+    sampler.start()
+    thread.start()
+    thread.join()
+    sampler.stop()
+
+    assert sampler.samples > 0
+    assert any(stack[-1] == f"{__name__}:busy" for stack in sampler.stacks)
+    # the main thread, waiting for the busy one, is idle
+    assert not any(stack[-1] in profiling.IDLE_FRAMES for stack in sampler.stacks)
+    assert "threading:_bootstrap;" in sampler.folded()
+
+
+def test_profiling_middleware(monkeypatch) -> None:
+    monkeypatch.setattr(config.settings, "profiling_token", "secret")
+    app = fastapi.FastAPI()
+    app.add_middleware(middlewares.ProfilingMiddleware)
+
+    @app.get("/busy")
+    def busy_endpoint() -> dict:
+        busy(0.1)
+        return {}
+
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/busy", headers={"X-Debug-Profile": "secret"})
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f"{__name__}:busy " in response.text
+
+    response = test_client.get("/busy", headers={"X-Debug-Profile": "wrong"})
+
+    assert response.json() == {}
+
+
+def test_profile_worker(monkeypatch) -> None:
+    app = fastapi.FastAPI()
+    app.include_router(profiling.router)
+    test_client = fastapi.testclient.TestClient(app)
+
+    response = test_client.get("/profile", params={"seconds": 0.01})
+
+    assert response.status_code == 404
+
+    monkeypatch.setattr(config.settings, "profiling_token", "secret")
+
+    response = test_client.get(
+        "/profile", params={"seconds": 0.01}, headers={"X-Debug-Profile": "wrong"}
+    )
+
+    assert response.status_code == 403
+
+    response = test_client.get(
+        "/profile", params={"seconds": 0.01}, headers={"X-Debug-Profile": "secret"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+
+
+def test_profile_worker_through_middlewares(monkeypatch) -> None:
+    monkeypatch.setattr(config.settings, "profiling_token", "secret")
+    test_client = fastapi.testclient.TestClient(cads_catalogue_api_service.main.app)
+
+    response = test_client.get(
+        "/profile", params={"seconds": 0.2}, headers={"X-Debug-Profile": "secret"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.elapsed.total_seconds() >= 0.2
+    assert not profiling.active.locked()
+
+
+def test_profiling_wraps_compression() -> None:
+    classes = middleware_classes(cads_catalogue_api_service.main.app)
+
+    assert classes.index(middlewares.ProfilingMiddleware) < classes.index(
+        BrotliMiddleware
+    )
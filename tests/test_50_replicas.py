@@ -0,0 +1,140 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any
+
+import pytest
+import sqlalchemy as sa
+
+from cads_catalogue_api_service import replicas
+
+
+class FakeSessionMaker:
+    def __init__(
+        self, name: str, checked_out: int = 0, fail: Exception | None = None
+    ) -> None:
+        self.name = name
+        self.checked_out = checked_out
+        self.fail = fail
+
+    def pool_statistics(self) -> dict[str, int]:
+        return {"checked_out": self.checked_out}
+
+    def get_db(self) -> Any:
+        if self.fail:
+            raise self.fail
+        yield self.name
+
+
+# connection refused, raised when connecting (no statement)
+REFUSED = sa.exc.OperationalError(None, None, Exception("refused"))
+
+
+def test_least_connections() -> None:
+    session_maker = replicas.ReplicaSessionMaker(
+        replicas=[
+            FakeSessionMaker("replica-0", checked_out=3),
+            FakeSessionMaker("replica-1", checked_out=1),
+        ],
+        fallback=FakeSessionMaker("primary"),
+    )
+
+    with session_maker.context_session() as session:
+        assert session == "replica-1"
+
+    session_maker.replicas[0].session_maker.checked_out = 0
+
+    with session_maker.context_session() as session:
+        assert session == "replica-0"
+
+
+def test_unhealthy_replicas() -> None:
+    session_maker = replicas.ReplicaSessionMaker(
+        replicas=[
+            FakeSessionMaker("replica-0", fail=REFUSED),
+            FakeSessionMaker("replica-1", checked_out=1),
+        ],
+        fallback=FakeSessionMaker("primary"),
+        retry_after=60,
+    )
+
+    with pytest.raises(sa.exc.OperationalError):
+        with session_maker.context_session():
+            pass
+
+    # failing replica is excluded
+    with session_maker.context_session() as session:
+        assert session == "replica-1"
+
+    session_maker.replicas[1].mark_unhealthy(60, reason="test")
+
+    # no more replicas: fallback to the primary
+    with session_maker.context_session() as session:
+        assert session == "primary"
+
+
+@pytest.mark.parametrize(
+    "error, unhealthy",
+    [
+        (REFUSED, True),
+        (
+            sa.exc.OperationalError(
+                "SELECT 1", {}, Exception("closed"), connection_invalidated=True
+            ),
+            True,
+        ),
+        (
+            sa.exc.OperationalError(
+                "SELECT 1", {}, Exception("canceling statement due to timeout")
+            ),
+            False,
+        ),
+    ],
+)
+def test_unhealthy_on_connection_failures(error, unhealthy) -> None:
+    session_maker = replicas.ReplicaSessionMaker(
+        replicas=[FakeSessionMaker("replica-0", fail=error)],
+        fallback=FakeSessionMaker("primary"),
+        retry_after=60,
+    )
+
+    with pytest.raises(sa.exc.OperationalError):
+        with session_maker.context_session():
+            pass
+
+    assert (session_maker.replicas[0].unhealthy_until > 0) is unhealthy
+
+
+def test_replica_lag(monkeypatch) -> None:
+    lags = {"replica-0": 100.0, "replica-1": 0.5}
+    monkeypatch.setattr(
+        replicas.Replica, "check_lag", lambda replica: lags[replica.name]
+    )
+    session_maker = replicas.ReplicaSessionMaker(
+        replicas=[
+            FakeSessionMaker("replica-0"),
+            FakeSessionMaker("replica-1", checked_out=10),
+        ],
+        fallback=FakeSessionMaker("primary"),
+        max_lag=5,
+        lag_check_interval=0,
+    )
+
+    with session_maker.context_session() as session:
+        assert session == "replica-1"
+
+    lags["replica-0"] = 0
+
+    with session_maker.context_session() as session:
+        assert session == "replica-0"
@@ -0,0 +1,54 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import structlog.testing
+
+from cads_catalogue_api_service import config, sqllog
+
+
+def test_normalize_sql() -> None:
+    statement = """SELECT resources.resource_id
+    FROM resources
+    WHERE resources.resource_uid IN (%(uid_1_1)s, %(uid_1_2)s) AND hidden = 'f'
+    LIMIT 10"""
+
+    assert sqllog.normalize_sql(statement) == (
+        "SELECT resources.resource_id FROM resources "
+        "WHERE resources.resource_uid IN (...) AND hidden = ? LIMIT ?"
+    )
+
+
+def test_parameters_shape() -> None:
+    assert sqllog.parameters_shape({"q": "era5", "ids": ["a", "b"], "limit": 3}) == {
+        "q": "str[4]",
+        "ids": "list[2]",
+        "limit": "int",
+    }
+    assert sqllog.parameters_shape([{"id": 1}, {"id": 2}]) == {
+        "rows": 2,
+        "first": {"id": "int"},
+    }
+
+
+def test_observe(monkeypatch) -> None:
+    monkeypatch.setattr(config.settings, "slow_query_threshold", 0.5)
+
+    with structlog.testing.capture_logs() as logs:
+        sqllog.observe(None, "SELECT 1", {}, 0.1)
+        sqllog.observe(None, "SELECT 'slow'", {"q": "era5"}, 1)
+
+    assert len(logs) == 1
+    assert logs[0]["sql"] == "SELECT ?"
+    assert logs[0]["parameters"] == {"q": "str[4]"}
+    assert logs[0]["plan"] is None
@@ -0,0 +1,88 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import fastapi
+import fastapi.testclient
+import httpx
+
+import cads_catalogue_api_service.main
+from cads_catalogue_api_service import config, replay, traffic
+
+
+def make_app() -> fastapi.FastAPI:
+    app = fastapi.FastAPI()
+    app.add_middleware(traffic.TrafficCaptureMiddleware)
+
+    @app.get("/datasets/{dataset_id}")
+    def dataset(dataset_id: str) -> dict:
+        if dataset_id == "broken":
+            raise fastapi.HTTPException(status_code=500)
+        return {"id": dataset_id}
+
+    return app
+
+
+def test_normalize_query() -> None:
+    assert traffic.normalize_query(b"q=era5&kw=b&kw=a") == "kw=b&kw=a&q=era5"
+
+
+def test_capture_and_replay(monkeypatch, tmp_path) -> None:
+    path = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(config.settings, "traffic_capture_path", str(path))
+    app = make_app()
+    client = fastapi.testclient.TestClient(app)
+
+    client.get("/datasets/era5?q=era5&kw=b", headers={config.PORTAL_HEADER_NAME: "c3s"})
+    client.get("/datasets/broken", headers={"Authorization": "secret"})
+
+    traffic.get_recorder(str(path)).flush()
+    lines = replay.load_lines(str(path))
+
+    assert [line["status"] for line in lines] == [200, 500]
+    assert lines[0]["route"] == "/datasets/{dataset_id}"
+    assert lines[0]["query"] == "kw=b&q=era5"
+    assert lines[0]["portal"] == "c3s"
+    assert lines[0]["size"] > 0
+    assert "secret" not in path.read_text()
+
+    async def run() -> dict:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://replay"
+        ) as replay_client:
+            return await replay.replay(lines, replay_client, concurrency=2)
+
+    report = asyncio.run(run())
+
+    assert report["requests"] == 2
+    assert report["routes"]["/datasets/{dataset_id}"]["error_rate"] == 0.5
+
+
+def test_capture_through_app(monkeypatch, tmp_path) -> None:
+    path = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(config.settings, "traffic_capture_path", str(path))
+    # middlewares are instantiated when the stack is built
+    app = cads_catalogue_api_service.main.app
+    monkeypatch.setattr(app, "middleware_stack", None)
+    client = fastapi.testclient.TestClient(app)
+
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "br"})
+    traffic.get_recorder(str(path)).flush()
+    (line,) = replay.load_lines(str(path))
+
+    assert response.headers["content-encoding"] == "br"
+    # size as sent, i.e. compressed
+    assert line["size"] == response.num_bytes_downloaded
+    assert line["size"] < len(response.content)
@@ -0,0 +1,103 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import fastapi.testclient
+import pytest
+
+from cads_catalogue_api_service import fastapisessionmaker, warmup
+from cads_catalogue_api_service.main import app
+
+client = fastapi.testclient.TestClient(app)
+
+
+@pytest.fixture
+def state(monkeypatch) -> warmup.WarmupState:
+    state = warmup.WarmupState()
+    monkeypatch.setattr("cads_catalogue_api_service.warmup.state", state)
+    return state
+
+
+def test_readiness(state) -> None:
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+    state.ready = True
+    state.duration = 1.5
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "warmup_duration": 1.5}
+
+
+def test_open_connections(tmp_path) -> None:
+    session_maker = fastapisessionmaker.FastAPISessionMaker(
+        f"sqlite:///{tmp_path}/test.db", engine_options={"pool_size": 3}
+    )
+
+    warmup.open_connections(session_maker, 5)
+
+    assert session_maker.pool_statistics()["checked_in"] == 3
+    assert session_maker.pool_statistics()["checked_out"] == 0
+
+
+class FakeApp:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def openapi(self) -> None:
+        self.calls.append("openapi")
+
+
+@pytest.mark.asyncio
+async def test_warm_up(state, monkeypatch) -> None:
+    fake_app = FakeApp()
+
+    async def warm_up_routes(app, paths):
+        app.calls.append("routes")
+
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.warmup.warm_up_databases",
+        lambda connections: fake_app.calls.append("databases"),
+    )
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.warmup.resolver.index.ensure_fresh",
+        lambda: fake_app.calls.append("resolver"),
+    )
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.warmup.warm_up_routes", warm_up_routes
+    )
+
+    await warmup.warm_up(fake_app)
+
+    assert fake_app.calls == ["databases", "resolver", "openapi", "routes"]
+    assert state.ready is True
+    assert state.errors == []
+
+
+@pytest.mark.asyncio
+async def test_warm_up_error(state, monkeypatch) -> None:
+    def warm_up_databases(connections):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(
+        "cads_catalogue_api_service.warmup.warm_up_databases", warm_up_databases
+    )
+
+    await warmup.warm_up(FakeApp())
+
+    # a failed warm-up doesn't prevent the service to accept traffic
+    assert state.ready is True
+    assert state.errors == ["RuntimeError('database is down')"]
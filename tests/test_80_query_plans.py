@@ -0,0 +1,196 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Regression tests of the query plans of the generated SQL.
+
+Plans (shape and cost) of a synthetic catalogue 100 times the current one are compared
+with the snapshots in `query_plans.json`: at smaller sizes sequential scans are often
+cheaper, and would be recorded as expected. The test is skipped until the snapshots are
+generated and committed. After an intended change, update them with:
+
+    make query-plans-update
+"""
+
+import itertools
+import json
+import pathlib
+from collections.abc import Iterator
+from typing import Any
+
+import cads_catalogue.database
+import pytest
+import sqlalchemy as sa
+import synthetic
+from sqlalchemy.dialects import postgresql
+
+from cads_catalogue_api_service import contents, messages, search_utils, vocabularies
+
+PLANS_PATH = pathlib.Path(__file__).parent / "query_plans.json"
+# plans costing more than the snapshot by this factor fail
+COST_TOLERANCE = 1.5
+# plan nodes failing the test when they are not in the snapshot
+UNEXPECTED_NODES = ("Seq Scan on resources", "Nested Loop")
+
+QUERIES = {"no q": None, "q": "temperature"}
+KEYWORDS = {
+    "no kw": [],
+    "1 category": ["Category 0: Keyword 1"],
+    "2 categories": [
+        "Category 0: Keyword 1",
+        "Category 0: Keyword 2",
+        "Category 1: Keyword 2",
+    ],
+}
+IDS = {"no idx": None, "idx": ["dataset-1", "dataset-2"]}
+PORTALS = {"no portals": None, "portals": ["c3s"]}
+
+
+def statements(session: sa.orm.Session) -> Iterator[tuple[str, Any]]:
+    resource = cads_catalogue.database.Resource
+    for (q_name, q), (kw_name, kw), (idx_name, idx), (
+        portals_name,
+        portals,
+    ) in itertools.product(
+        QUERIES.items(), KEYWORDS.items(), IDS.items(), PORTALS.items()
+    ):
+        search = search_utils.apply_filters(
+            session,
+            session.query(resource.resource_id),
+            q=q,
+            kw=kw,
+            idx=idx,
+            portals=portals,
+        )
+        yield f"apply_filters, {q_name}, {kw_name}, {idx_name}, {portals_name}", search
+    search = search_utils.apply_filters(
+        session, session.query(resource.resource_id), "temperature", None, None
+    )
+    yield (
+        "fulltext_order_by",
+        search.order_by(search_utils.fulltext_order_by("temperature")),
+    )
+    yield "messages, global", messages.messages_statement(site="cds")
+    yield (
+        "messages, dataset",
+        messages.messages_statement(is_global=False, collection_id="dataset-1"),
+    )
+    yield (
+        "messages, changelog",
+        messages.messages_statement(
+            live=False, is_global=False, collection_id="dataset-1"
+        ),
+    )
+    for scope in vocabularies.LicenceScopeCriterion:
+        yield f"licences, {scope.value}", vocabularies.licences_statement(scope)
+    yield (
+        "licences, portals",
+        vocabularies.licences_statement(
+            vocabularies.LicenceScopeCriterion.all, portals=["c3s"]
+        ),
+    )
+    yield "typeahead", search_utils.apply_filters_typeahead(session, "tem")
+    yield "contents", contents.contents_statement("cds")
+    yield "contents, type", contents.contents_statement("cds", ctype=["page"])
+    yield (
+        "contents, related dataset",
+        contents.contents_statement("cds", related_dataset=["dataset-1"]),
+    )
+
+
+def explain(session: sa.orm.Session, statement: Any) -> dict[str, Any]:
+    """Return the plan of the statement, with parameters rendered inline."""
+    if isinstance(statement, sa.orm.Query):
+        statement = statement.statement
+    sql = statement.compile(
+        # named paramstyle: percent signs of literals are not doubled
+        dialect=postgresql.dialect(paramstyle="named"),
+        compile_kwargs={"literal_binds": True},
+    )
+    result = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+    return result.scalar()[0]["Plan"]
+
+
+def plan_shape(plan: dict[str, Any], depth: int = 0) -> list[str]:
+    """Return the plan nodes, one per line, indented by depth."""
+    node = plan["Node Type"]
+    if "Join Type" in plan:
+        node += f" ({plan['Join Type']})"
+    if "Relation Name" in plan:
+        node += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        node += f" using {plan['Index Name']}"
+    shape = ["  " * depth + node]
+    for child in plan.get("Plans", []):
+        shape += plan_shape(child, depth + 1)
+    return shape
+
+
+def compare(name: str, plan: dict[str, Any], snapshot: dict[str, Any]) -> list[str]:
+    shape = plan_shape(plan)
+    failures = []
+    for unexpected in UNEXPECTED_NODES:
+        if any(unexpected in node for node in shape) and not any(
+            unexpected in node for node in snapshot["shape"]
+        ):
+            failures.append(f"{name}: unexpected {unexpected}")
+    if shape != snapshot["shape"]:
+        failures.append(
+            f"{name}: plan changed from\n"
+            + "\n".join(snapshot["shape"])
+            + "\nto\n"
+            + "\n".join(shape)
+        )
+    if plan["Total Cost"] > snapshot["cost"] * COST_TOLERANCE:
+        failures.append(
+            f"{name}: cost increased from {snapshot['cost']} to {plan['Total Cost']}"
+        )
+    return failures
+
+
+@pytest.mark.parametrize(
+    "catalogue_sessionmaker",
+    [synthetic.CURRENT_DATASETS * max(synthetic.SCALES)],
+    indirect=True,
+)
+def test_query_plans(request, catalogue_sessionmaker) -> None:
+    update = request.config.getoption("--update-query-plans")
+    if not update and not PLANS_PATH.exists():
+        pytest.skip(f"{PLANS_PATH.name} not generated yet: run make query-plans-update")
+
+    with catalogue_sessionmaker.context_session() as session:
+        plans = {
+            name: explain(session, statement) for name, statement in statements(session)
+        }
+
+    if update:
+        PLANS_PATH.write_text(
+            json.dumps(
+                {
+                    name: {"shape": plan_shape(plan), "cost": plan["Total Cost"]}
+                    for name, plan in plans.items()
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        pytest.skip("query plans snapshots written")
+
+    snapshots = json.loads(PLANS_PATH.read_text())
+    failures = []
+    for name, plan in plans.items():
+        if name in snapshots:
+            failures += compare(name, plan, snapshots[name])
+        else:
+            failures.append(f"{name}: no snapshot (run with --update-query-plans)")
+    assert not failures, "\n\n".join(failures)
@@ -0,0 +1,71 @@
+# Copyright 2025, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Budgets of SQL statements executed by each route, on a cold synthetic catalogue.
+
+Budgets are the counts observed, and must not depend on page size or catalogue size: a
+route loading something for each dataset (N+1 queries) exceeds them on the largest
+catalogue. Catalogues stay below 500 datasets: facets load the keywords of all the
+matching datasets, with one statement every 500 datasets (see `sa.orm.selectinload`).
+"""
+
+import fastapi.testclient
+import pytest
+from testing import StatementCounter, assert_statement_budget, clear_caches
+
+from cads_catalogue_api_service.main import app
+
+client = fastapi.testclient.TestClient(app)
+
+CATALOGUE_SIZES = [100, 400]
+
+# resolver index (catalogue version and entries) is loaded by the first request, and
+# contents are filtered by site (none without the site header)
+STATEMENT_BUDGETS = {
+    "/collections?limit=50": 7,
+    "/datasets?limit=50": 9,
+    "/datasets?limit=50&kw=Category 0: Keyword 1&kw=Category 1: Keyword 2": 9,
+    "/datasets?limit=50&q=dataset": 9,
+    "/datasets/facets?kw=Category 0: Keyword 1": 4,
+    "/collections/dataset-1": 7,
+    "/collections/dataset-1/schema.org": 7,
+    "/collections/dataset-1/messages": 1,
+    "/messages": 1,
+    "/vocabularies/keywords": 1,
+    "/vocabularies/licences": 1,
+    "/contents": 2,
+    "/typeahead?chars=dataset": 1,
+}
+
+
+@pytest.mark.parametrize("catalogue_sessionmaker", CATALOGUE_SIZES, indirect=True)
+@pytest.mark.parametrize("path, budget", STATEMENT_BUDGETS.items())
+def test_statement_budget(catalogue_sessionmaker, path: str, budget: int) -> None:
+    with StatementCounter(catalogue_sessionmaker.cached_engine) as counter:
+        response = client.get(path)
+
+    assert response.status_code < 500
+    assert_statement_budget(counter, path, budget)
+
+
+@pytest.mark.parametrize("path", ["/collections", "/datasets"])
+def test_statements_independent_of_page_size(catalogue_sessionmaker, path) -> None:
+    counts = []
+    for limit in (5, 50):
+        clear_caches()
+        with StatementCounter(catalogue_sessionmaker.cached_engine) as counter:
+            client.get(f"{path}?limit={limit}")
+        counts.append(len(counter))
+
+    assert counts[0] == counts[1]
@@ -14,10 +14,13 @@
 
 import datetime
 import urllib
+from typing import Any
 
 import cads_catalogue.database
+import sqlalchemy as sa
 
 import cads_catalogue_api_service.models
+from cads_catalogue_api_service import resolver, search_utils
 from cads_catalogue_api_service.sanity_check import SanityCheckStatus
 
 
@@ -276,3 +279,57 @@ def generate_expected(
             "keywords": ["kw1"],
         }
     return expected
+
+
+class StatementCounter:
+    """Record the SQL statements executed on an engine, while used as context manager.
+
+    Statements executed by other threads (e.g. concurrent facets) are recorded too.
+    """
+
+    def __init__(self, engine: sa.engine.Engine) -> None:
+        self.engine = engine
+        self.statements: list[str] = []
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "StatementCounter":
+        sa.event.listen(self.engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        sa.event.remove(self.engine, "before_cursor_execute", self.record)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+def assert_statement_budget(counter: StatementCounter, path: str, budget: int) -> None:
+    """Fail listing the statements, if more than `budget` were executed for `path`."""
+    statements = "\n\n".join(counter.statements)
+    assert len(counter) <= budget, (
+        f"{path} executed {len(counter)} SQL statements (budget: {budget}):\n"
+        f"{statements}"
+    )
+
+
+def clear_caches() -> None:
+    """Empty the in-process caches of search results and the resolver index."""
+    for cache in (
+        search_utils.search_ids_cache,
+        search_utils.facets_cache,
+        search_utils.pages_cache,
+    ):
+        cache.clear()
+    resolver.index.invalidate()
+
+
+def middleware_classes(app: Any) -> list[type]:
+    """Return the classes of the middlewares of the application, outermost first."""
+    classes = []
+    layer = app.build_middleware_stack()
+    while hasattr(layer, "app") and not callable(getattr(type(layer), "app", None)):
+        classes.append(type(layer))
+        layer = layer.app
+    return classes